@@ -0,0 +1,22 @@
+"""
+Shared Prompts - Prompt sections common to every editor agent.
+"""
+
+
+# Placed first in each editor prompt so the agents share an identical prefix
+REPLACE_RULE = """## CRITICAL EDITING RULE - ALWAYS DELETE OLD CONTENT WHEN REVISING:
+When you modify, fix, or revise ANY existing content (including [VISUAL] and [AUDIO] tags):
+- Use `replace_lines` to swap old content with new content (this deletes AND inserts in one operation)
+- OR use `delete_lines` first, THEN `insert_lines` to add the replacement
+- NEVER just insert new content below/above old content without deleting the original
+- If you're revising a line or tag, the OLD version must be REMOVED, not left in place
+
+WRONG (creates duplicates):
+  Line 50: "> [VISUAL] Wide shot."
+  → insert_lines(after_line=50, content="> [VISUAL] Wide establishing shot, sunset.")
+  Result: BOTH lines exist (BROKEN!)
+
+CORRECT (replaces properly):
+  Line 50: "> [VISUAL] Wide shot."
+  → replace_lines(start=50, end=50, content="> [VISUAL] Wide establishing shot, sunset.")
+  Result: Only the new line exists (CORRECT!)"""
@@ -5,33 +5,19 @@ Checker Editor Agent - Validates and fixes issues using document editing tools.
 from google import genai
 
 from .editor_agent import EditorAgent
+from ._shared_prompts import REPLACE_RULE
 from ..context.manager import ContextManager
 
 
-CHECKER_EDITOR_PROMPT = """You are a meticulous script supervisor and PLOT HOLE DETECTIVE.
+CHECKER_EDITOR_PROMPT = f"""{REPLACE_RULE}
+
+You are a meticulous script supervisor and PLOT HOLE DETECTIVE.
 
 ## Your Role:
 - Validate the script for consistency and logic
 - Fix any issues you find using targeted edits
 - Most importantly: IDENTIFY PLOT HOLES
 
-## CRITICAL EDITING RULE - ALWAYS DELETE OLD CONTENT WHEN FIXING:
-When you fix or revise ANY existing content:
-- Use `replace_lines` to swap old content with new content (this deletes AND inserts in one operation)
-- OR use `delete_lines` first, THEN `insert_lines` to add the replacement
-- NEVER just insert new/fixed content below/above old content without deleting the original
-- If you're fixing a line, the OLD line must be REMOVED, not left in place
-
-WRONG (creates duplicates):
-  Line 50: "**JOHN:** Hello world"
-  → insert_lines(after_line=50, content="**JOHN:** Hello, world!")
-  Result: BOTH dialogue lines exist (BROKEN!)
-
-CORRECT (replaces properly):
-  Line 50: "**JOHN:** Hello world"
-  → replace_lines(start=50, end=50, content="**JOHN:** Hello, world!")
-  Result: Only the fixed line exists (CORRECT!)
-
 ## PLOT HOLE CHECK (MOST IMPORTANT):
 Ask yourself for EVERY major plot point:
 
@@ -90,9 +76,9 @@ class CheckerEditorAgent(EditorAgent):
             context_manager=context_manager,
         )
     
-    def check_and_fix(self, editor, draft_num: int) -> dict:
-        """Check the draft and fix any issues."""
-        task = f"""Validate and fix this script (Draft {draft_num}).
+    def _build_task(self, draft_num: int) -> str:
+        """Build the validation task for a draft."""
+        return f"""Validate and fix this script (Draft {draft_num}).
 
 PRIORITY ORDER:
 1. CHECK FOR PLOT HOLES FIRST
@@ -112,6 +98,24 @@ If you find issues:
   - Any PLOT HOLES found (even if you couldn't fix them)
 
 Be ruthless about plot holes. A story with a gaping logic gap is worse than a rough draft."""
-
-        return self.call(editor, task, draft_num)
+    
+    async def check_and_fix(self, editor, draft_num: int) -> dict:
+        """Check the draft and fix any issues."""
+        return await self.acall(editor, self._build_task(draft_num), draft_num)
+    
+    async def check_and_fix_batch(self, drafts: list[tuple]) -> list[dict]:
+        """
+        Check and fix drafts through the Batch API (non-interactive).
+        
+        Args:
+            drafts: List of (editor, draft_num) tuples
+            
+        Returns:
+            One result dict per draft
+        """
+        job_name = await self.submit_batch([
+            (editor, self._build_task(draft_num), draft_num)
+            for editor, draft_num in drafts
+        ])
+        return await self.wait_batch(job_name)
 
@@ -5,33 +5,19 @@ Composer Editor Agent - Adds audio direction using document editing tools.
 from google import genai
 
 from .editor_agent import EditorAgent
+from ._shared_prompts import REPLACE_RULE
 from ..context.manager import ContextManager
 
 
-COMPOSER_EDITOR_PROMPT = """You are an expert film composer adding [AUDIO] direction to a script.
+COMPOSER_EDITOR_PROMPT = f"""{REPLACE_RULE}
+
+You are an expert film composer adding [AUDIO] direction to a script.
 
 ## Your Role:
 - Add [AUDIO] blockquote tags throughout the existing script
 - Specify musical score, ambient sounds, and sound effects
 - Do NOT modify narrative text, dialogue, or existing [VISUAL] tags
 
-## CRITICAL EDITING RULE - ALWAYS DELETE OLD CONTENT WHEN REVISING:
-When you modify, improve, or revise ANY existing [AUDIO] tags:
-- Use `replace_lines` to swap old content with new content (this deletes AND inserts in one operation)
-- OR use `delete_lines` first, THEN `insert_lines` to add the replacement
-- NEVER just insert new content below/above old content without deleting the original
-- If you're improving an [AUDIO] tag, the OLD tag must be REMOVED, not left in place
-
-WRONG (creates duplicates):
-  Line 50: "> [AUDIO] SFX: Door opens."
-  → insert_lines(after_line=50, content="> [AUDIO] SFX: Door creaks open slowly.")
-  Result: BOTH [AUDIO] tags exist (BROKEN!)
-
-CORRECT (replaces properly):
-  Line 50: "> [AUDIO] SFX: Door opens."
-  → replace_lines(start=50, end=50, content="> [AUDIO] SFX: Door creaks open slowly.")
-  Result: Only the new [AUDIO] tag exists (CORRECT!)
-
 ## How to Add Audio Direction:
 1. Read the document to find scenes and emotional beats
 2. For each scene, add 2-3 [AUDIO] blocks at appropriate moments
@@ -82,7 +68,7 @@ class ComposerEditorAgent(EditorAgent):
             context_manager=context_manager,
         )
     
-    def add_audio(self, editor, draft_num: int) -> dict:
+    async def add_audio(self, editor, draft_num: int) -> dict:
         """Add audio direction to the draft."""
         task = f"""Add [AUDIO] direction tags throughout this script (Draft {draft_num}).
 
@@ -95,5 +81,5 @@ Instructions:
 
 Focus on sound design that enhances emotional impact."""
 
-        return self.call(editor, task, draft_num)
+        return await self.acall(editor, task, draft_num)
 
@@ -5,33 +5,19 @@ Designer Editor Agent - Adds visual direction using document editing tools.
 from google import genai
 
 from .editor_agent import EditorAgent
+from ._shared_prompts import REPLACE_RULE
 from ..context.manager import ContextManager
 
 
-DESIGNER_EDITOR_PROMPT = """You are an expert cinematographer adding [VISUAL] direction to a script.
+DESIGNER_EDITOR_PROMPT = f"""{REPLACE_RULE}
+
+You are an expert cinematographer adding [VISUAL] direction to a script.
 
 ## Your Role:
 - Add [VISUAL] blockquote tags throughout the existing script
 - Specify shot types, camera angles, movements, lighting, and color
 - Do NOT modify narrative text, dialogue, or existing [AUDIO] tags
 
-## CRITICAL EDITING RULE - ALWAYS DELETE OLD CONTENT WHEN REVISING:
-When you modify, improve, or revise ANY existing [VISUAL] tags:
-- Use `replace_lines` to swap old content with new content (this deletes AND inserts in one operation)
-- OR use `delete_lines` first, THEN `insert_lines` to add the replacement
-- NEVER just insert new content below/above old content without deleting the original
-- If you're improving a [VISUAL] tag, the OLD tag must be REMOVED, not left in place
-
-WRONG (creates duplicates):
-  Line 50: "> [VISUAL] Wide shot."
-  → insert_lines(after_line=50, content="> [VISUAL] Wide establishing shot, sunset.")
-  Result: BOTH [VISUAL] tags exist (BROKEN!)
-
-CORRECT (replaces properly):
-  Line 50: "> [VISUAL] Wide shot."
-  → replace_lines(start=50, end=50, content="> [VISUAL] Wide establishing shot, sunset.")
-  Result: Only the new [VISUAL] tag exists (CORRECT!)
-
 ## How to Add Visual Direction:
 1. Read the document to find scenes and key narrative moments
 2. For each scene, add 2-4 [VISUAL] blocks at appropriate moments
@@ -81,7 +67,7 @@ class DesignerEditorAgent(EditorAgent):
             context_manager=context_manager,
         )
     
-    def add_visuals(self, editor, draft_num: int) -> dict:
+    async def add_visuals(self, editor, draft_num: int) -> dict:
         """Add visual direction to the draft."""
         task = f"""Add [VISUAL] direction tags throughout this script (Draft {draft_num}).
 
@@ -94,5 +80,5 @@ Instructions:
 
 Focus on cinematography that enhances the story's emotional beats."""
 
-        return self.call(editor, task, draft_num)
+        return await self.acall(editor, task, draft_num)
 
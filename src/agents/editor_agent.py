@@ -2,16 +2,65 @@
 Editor Agent - Base class for agents that edit the working document using tools.
 """
 
+import asyncio
+import difflib
+import hashlib
 import json
+import logging
 from typing import Optional
 from google import genai
 from google.genai import types
 
-from ..config import MODEL_NAME, THINKING_LEVEL
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+from ..config import (
+    MODEL_NAME,
+    THINKING_LEVEL,
+    BATCH_POLL_INTERVAL_SECONDS,
+    FULL_DOCUMENT_MAX_LINES,
+)
 from ..context.manager import ContextManager
+from ..context.prompt_cache import PromptCache
 from ..document.editor import DocumentEditor, DOCUMENT_TOOLS
 
 
+logger = logging.getLogger("hollywoodai.agent")
+
+
+def _dumps(obj) -> str:
+    """Serialize a tool result to compact JSON, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+# Tools that only read the document and can safely run side by side
+READ_ONLY_TOOLS = frozenset({"read_document", "read_lines", "find_section", "scan_changes_since"})
+
+# Thinking config shared by every editor request
+_THINKING_CONFIG = types.ThinkingConfig(thinking_level=THINKING_LEVEL)
+
+# Gemini tool declarations for DOCUMENT_TOOLS, built once at import
+_TOOLS = [types.Tool(function_declarations=[
+    types.FunctionDeclaration(**tool) for tool in DOCUMENT_TOOLS
+])]
+
+# Batch jobs in these states will not change any further
+BATCH_DONE_STATES = frozenset({
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+})
+
+BATCH_EDIT_INSTRUCTIONS = """This request runs offline: make ALL of your edits as tool calls in this single response, then call editing_complete.
+Tool results will not be returned to you. Edits are applied in the order you emit them, so work from the bottom of the document upward to keep line numbers valid."""
+
+
 class EditorAgent:
     """
     Base class for agents that use tool calling to edit a shared document.
@@ -51,140 +100,460 @@ class EditorAgent:
         self.conversation_history: list[dict] = []
         self.memory_reminder: Optional[str] = None
         
-        # Build tool declarations for Gemini
-        self.tools = self._build_tools()
-    
-    def _build_tools(self) -> list[types.Tool]:
-        """Build Gemini tool declarations from DOCUMENT_TOOLS."""
-        function_declarations = []
+        # Document state sent with each user turn, keyed by history index.
+        # History entries carry a doc_ref instead of a copy of the document.
+        self._doc_snapshots: dict[int, str] = {}
         
-        for tool in DOCUMENT_TOOLS:
-            func_decl = types.FunctionDeclaration(
-                name=tool["name"],
-                description=tool["description"],
-                parameters=tool["parameters"],
-            )
-            function_declarations.append(func_decl)
+        # Draft whose start last re-anchored the history's running token
+        # total (kept by the context manager) on an exact count
+        self._verified_draft: int = 0
+        
+        # Chat session reused across calls until the context is offloaded
+        self._chat = None
+        
+        # Responses owed to the chat session for the calls in its last turn,
+        # sent ahead of the next task so the session stays valid
+        self._pending_responses: list[types.Part] = []
+        
+        # Last document state this agent's chat session has seen, so later
+        # turns can send a diff instead of the full document
+        self._last_doc_hash: Optional[str] = None
+        self._last_doc_snapshot: Optional[str] = None
         
-        return [types.Tool(function_declarations=function_declarations)]
+        # Batch jobs awaiting results, keyed by job name
+        self._pending_batches: dict[str, list[tuple[DocumentEditor, str, int]]] = {}
+        
+        # Tool declarations are identical for every editor agent
+        self.tools = _TOOLS
+        
+        # Tool name -> handler, built once instead of walking an if/elif chain per call
+        self._dispatch = {
+            "read_document": self._tool_read_document,
+            "read_lines": self._tool_read_lines,
+            "insert_lines": self._tool_insert_lines,
+            "delete_lines": self._tool_delete_lines,
+            "replace_lines": self._tool_replace_lines,
+            "find_section": self._tool_find_section,
+            "insert_after_pattern": self._tool_insert_after_pattern,
+            "scan_changes_since": self._tool_scan_changes_since,
+            "editing_complete": self._tool_editing_complete,
+        }
+        
+        # System prompt + tool schema are static, so upload them once as a context cache
+        self._cache = PromptCache(client, system_prompt, tools=self.tools)
+        
+        # Token count of the static system prompt, counted once on first use
+        self._system_prompt_tokens: Optional[int] = None
+    
+    async def _tool_read_document(self, args: dict, editor: DocumentEditor) -> dict:
+        """Return the whole document with line numbers."""
+        return {
+            "line_count": editor.get_line_count(),
+            "content": editor.read_document_with_numbers(),
+        }
+    
+    async def _tool_read_lines(self, args: dict, editor: DocumentEditor) -> dict:
+        """Return a numbered line range."""
+        return {
+            "start": args["start"],
+            "end": args["end"],
+            "content": editor.read_lines(args["start"], args["end"]),
+        }
+    
+    async def _tool_insert_lines(self, args: dict, editor: DocumentEditor) -> dict:
+        """Insert lines after a given line."""
+        async with editor.lock:
+            result = editor.insert_lines(
+                args["after_line"],
+                args["content"],
+                agent=self.name,
+            )
+        return result
+    
+    async def _tool_delete_lines(self, args: dict, editor: DocumentEditor) -> dict:
+        """Delete a line range."""
+        async with editor.lock:
+            result = editor.delete_lines(
+                args["start"],
+                args["end"],
+                agent=self.name,
+            )
+        return result
+    
+    async def _tool_replace_lines(self, args: dict, editor: DocumentEditor) -> dict:
+        """Replace a line range with new content."""
+        async with editor.lock:
+            result = editor.replace_lines(
+                args["start"],
+                args["end"],
+                args["content"],
+                agent=self.name,
+            )
+        return result
     
-    def _execute_tool(self, tool_name: str, args: dict, editor: DocumentEditor) -> str:
+    async def _tool_find_section(self, args: dict, editor: DocumentEditor) -> dict:
+        """Locate a section by header pattern."""
+        section = editor.find_section(args["section_name"])
+        if section is None:
+            return {"error": f"No section matching '{args['section_name']}'"}
+        return section
+    
+    async def _tool_insert_after_pattern(self, args: dict, editor: DocumentEditor) -> dict:
+        """Insert lines after the first line matching a pattern."""
+        async with editor.lock:
+            result = editor.insert_after_pattern(
+                args["pattern"],
+                args["content"],
+                agent=self.name,
+            )
+        return result
+    
+    async def _tool_scan_changes_since(self, args: dict, editor: DocumentEditor) -> dict:
+        """List edits made after a document version."""
+        return editor.scan_changes_since(args["version"])
+    
+    async def _tool_editing_complete(self, args: dict, editor: DocumentEditor) -> dict:
+        """Acknowledge the agent's completion summary."""
+        return {"result": f"EDITING_COMPLETE: {args.get('summary', 'No summary provided')}"}
+    
+    async def _execute_tool(self, tool_name: str, args: dict, editor: DocumentEditor) -> dict:
         """
         Execute a tool call and return the result.
         
+        Mutations are serialized through the editor's lock so agents running
+        concurrently on the same document never interleave a write.
+        
         Args:
             tool_name: Name of the tool to execute
             args: Arguments for the tool
             editor: DocumentEditor instance
             
         Returns:
-            String result of the tool execution
+            Result dict, passed to the model as the FunctionResponse as is
         """
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
+            return {"error": f"Unknown tool: {tool_name}"}
+        
         try:
-            if tool_name == "read_document":
-                content = editor.read_document_with_numbers()
-                return f"Document ({editor.get_line_count()} lines):\n{content}"
-            
-            elif tool_name == "read_lines":
-                content = editor.read_lines(args["start"], args["end"])
-                return f"Lines {args['start']}-{args['end']}:\n{content}"
-            
-            elif tool_name == "insert_lines":
-                result = editor.insert_lines(
-                    args["after_line"],
-                    args["content"],
-                    agent=self.name,
-                )
-                return json.dumps(result)
-            
-            elif tool_name == "delete_lines":
-                result = editor.delete_lines(
-                    args["start"],
-                    args["end"],
-                    agent=self.name,
-                )
-                return json.dumps(result)
+            return await handler(args, editor)
+        except Exception as e:
+            return {"error": f"Error executing {tool_name}: {str(e)}"}
+    
+    def _schedule_tool(
+        self,
+        fc: types.FunctionCall,
+        editor: DocumentEditor,
+        scheduled: list[tuple[asyncio.Task, bool]],
+    ) -> asyncio.Task:
+        """
+        Start a tool call as a task, ordered against the calls scheduled before it.
+        
+        Read-only calls wait only for earlier mutations, so reads between two
+        edits run side by side. Mutations wait for every earlier call, since
+        each edit shifts the line numbers the next one was written against.
+        
+        Args:
+            fc: Function call to run
+            editor: DocumentEditor instance
+            scheduled: (task, is_mutation) pairs for earlier calls; updated in place
             
-            elif tool_name == "replace_lines":
-                result = editor.replace_lines(
-                    args["start"],
-                    args["end"],
-                    args["content"],
-                    agent=self.name,
-                )
-                return json.dumps(result)
+        Returns:
+            Task resolving to the tool result
+        """
+        is_mutation = fc.name not in READ_ONLY_TOOLS
+        prerequisites = [task for task, mutation in scheduled if is_mutation or mutation]
+        
+        async def run() -> dict:
+            if prerequisites:
+                await asyncio.wait(prerequisites)
+            return await self._execute_tool(fc.name, dict(fc.args), editor)
+        
+        task = asyncio.create_task(run())
+        scheduled.append((task, is_mutation))
+        return task
+    
+    async def _execute_tool_calls(
+        self,
+        function_calls: list[types.FunctionCall],
+        editor: DocumentEditor,
+    ) -> list[dict]:
+        """
+        Execute the function calls from one model turn.
+        
+        Args:
+            function_calls: Function calls in the order the model emitted them
+            editor: DocumentEditor instance
             
-            elif tool_name == "find_section":
-                result = editor.find_section(args["section_name"])
-                return json.dumps(result)
+        Returns:
+            Tool results in the same order as function_calls
+        """
+        scheduled: list[tuple[asyncio.Task, bool]] = []
+        tasks = [self._schedule_tool(fc, editor, scheduled) for fc in function_calls]
+        return list(await asyncio.gather(*tasks))
+    
+    async def _stream_turn(
+        self,
+        chat,
+        message: list[types.Part],
+        editor: DocumentEditor,
+        config: Optional[types.GenerateContentConfig] = None,
+    ) -> tuple[list[types.FunctionCall], list[dict], Optional[types.FunctionCall], list[types.FunctionCall], str]:
+        """
+        Send one message and stream the reply, starting each tool call as soon
+        as its part arrives instead of waiting for the whole turn.
+        
+        Calls emitted after editing_complete in the same turn are not run.
+        
+        Args:
+            chat: Async chat session
+            message: Parts to send
+            editor: DocumentEditor instance
+            config: Per-message config overriding the session's
             
-            elif tool_name == "insert_after_pattern":
-                result = editor.insert_after_pattern(
-                    args["pattern"],
-                    args["content"],
-                    agent=self.name,
-                )
-                return json.dumps(result)
+        Returns:
+            Tuple of (function calls, their results, editing_complete call or
+            None, calls skipped after it, reply text)
+        """
+        function_calls: list[types.FunctionCall] = []
+        scheduled: list[tuple[asyncio.Task, bool]] = []
+        complete_call = None
+        skipped_calls: list[types.FunctionCall] = []
+        text_parts: list[str] = []
+        
+        stream = await chat.send_message_stream(message, config=config)
+        async for chunk in stream:
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
+                if part.function_call:
+                    if complete_call is not None:
+                        skipped_calls.append(part.function_call)
+                        continue
+                    if part.function_call.name == "editing_complete":
+                        complete_call = part.function_call
+                        continue
+                    function_calls.append(part.function_call)
+                    self._schedule_tool(part.function_call, editor, scheduled)
+                elif part.text and not part.thought:
+                    text_parts.append(part.text)
+        
+        results = list(await asyncio.gather(*[task for task, _ in scheduled]))
+        return function_calls, results, complete_call, skipped_calls, "".join(text_parts)
+    
+    def _render_document_state(self, editor: DocumentEditor) -> tuple[str, str]:
+        """
+        Render the document state for the next message.
+        
+        Sends the full numbered document the first time a session sees it
+        (or just its outline if it is long), then only a unified diff against the last snapshot (or a short note
+        if nothing changed). The model can call read_document for a refresh.
+        
+        Args:
+            editor: DocumentEditor instance
             
-            elif tool_name == "editing_complete":
-                return f"EDITING_COMPLETE: {args.get('summary', 'No summary provided')}"
+        Returns:
+            Tuple of (document state text, mode) where mode is one of
+            "empty", "full", "outline", "diff" or "unchanged"
+        """
+        line_count = editor.get_line_count()
+        if line_count == 0:
+            return "The document is currently EMPTY. You need to create the initial content.", "empty"
+        
+        content = editor.get_content()
+        doc_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+        
+        if self._last_doc_snapshot is not None:
+            if doc_hash == self._last_doc_hash:
+                return (
+                    f"Document unchanged since your last turn (hash {doc_hash}, {line_count} lines). "
+                    "Call read_document if you need to see it again."
+                ), "unchanged"
             
-            else:
-                return f"Unknown tool: {tool_name}"
-                
-        except Exception as e:
-            return f"Error executing {tool_name}: {str(e)}"
+            diff = "\n".join(difflib.unified_diff(
+                self._last_doc_snapshot.splitlines(),
+                content.splitlines(),
+                fromfile="previous",
+                tofile="current",
+                n=3,
+                lineterm="",
+            ))
+            # A diff only helps while it is smaller than the document itself
+            if len(diff) < len(content):
+                return f"""## DOCUMENT CHANGES SINCE YOUR LAST TURN (hash {doc_hash}, version {editor.version}, now {line_count} lines)
+
+Hunk headers give line numbers in the current document.
+
+```diff
+{diff}
+```
+
+Call read_document or read_lines if you need the full current text.""", "diff"
+        
+        if line_count > FULL_DOCUMENT_MAX_LINES:
+            outline = "\n".join(
+                f"Line {line_number}: {heading}" for line_number, heading in editor.get_outline()
+            )
+            return f"""## DOCUMENT OUTLINE (version {editor.version}, {line_count} lines)
+
+{outline}
+
+The document is too long to include in full. Use read_lines to pull the sections you need before editing them.""", "outline"
+        
+        return self._full_document_state(editor), "full"
+    
+    def _full_document_state(self, editor: DocumentEditor) -> str:
+        """Render the full numbered document for a message."""
+        return f"""## CURRENT DOCUMENT STATE (version {editor.version}, {editor.get_line_count()} lines)
+
+{editor.read_document_with_numbers()}
+
+---
+END OF DOCUMENT"""
+    
+    def _remember_document(self, editor: DocumentEditor) -> None:
+        """Snapshot the document as this agent's session last saw it."""
+        content = editor.get_content()
+        self._last_doc_snapshot = content
+        self._last_doc_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _forget_document(self) -> None:
+        """Drop the snapshot, e.g. when a new session has not seen the document."""
+        self._last_doc_snapshot = None
+        self._last_doc_hash = None
     
-    def _check_and_manage_context(self, draft_num: int) -> None:
+    async def manage_context(self, draft_num: int) -> None:
         """
         Check context usage and offload if necessary.
         
+        Awaits the summary on the async client, so the pipeline can offload
+        several agents concurrently.
+        
         Args:
             draft_num: Current draft number for archive naming
         """
         if not self.conversation_history:
             return
         
+        if draft_num != self._verified_draft:
+            # Re-anchor the running count on an exact remote count once per
+            # draft; the count makes blocking RPCs, so it runs in a worker
+            # thread to keep the event loop free for sibling agents
+            verified_tokens = await asyncio.to_thread(
+                self.context_manager.count_tokens,
+                self.conversation_history,
+                self._doc_snapshots,
+                verify=True,
+                agent_name=self.name,
+            )
+            self.context_manager.set_running_tokens(
+                self.conversation_history,
+                self.name,
+                verified_tokens,
+            )
+            self._verified_draft = draft_num
+        
         # Check if we should offload
-        if self.context_manager.should_offload(self.conversation_history):
-            stats = self.context_manager.get_context_stats(self.conversation_history)
-            print(f"  [{self.name}] Context threshold reached ({stats['percentage_used']:.1f}% used)")
+        stats = self.get_context_stats()
+        if stats["should_offload"]:
+            logger.info("  [%s] Context threshold reached (%.1f%% used)", self.name, stats["percentage_used"])
             
             # Offload context
-            filepath, summary, memory_reminder = self.context_manager.offload_context(
+            filepath, summary, memory_reminder = await self.context_manager.aoffload_context(
                 self.conversation_history,
                 self.name,
                 draft_num,
+                doc_snapshots=self._doc_snapshots,
             )
             
             # Store memory reminder for next message
             self.memory_reminder = memory_reminder
             
-            # Clear history after offload
+            # Clear history after offload; the chat session holds the same
+            # turns, so start a fresh one
+            self.context_manager.release(self.name)
             self.conversation_history = []
-            print(f"  [{self.name}] Context archived to: {filepath}")
+            self._doc_snapshots = {}
+            self._chat = None
+            logger.info("  [%s] Context archived to: %s", self.name, filepath)
     
-    def _add_to_history(self, role: str, content: str) -> None:
+    def _add_to_history(self, role: str, content: str, document_state: Optional[str] = None) -> None:
         """
         Add a message to conversation history.
         
         Args:
             role: 'user' or 'assistant'
             content: Message content
+            document_state: Document text sent with the message, stored once
+                as a snapshot and referenced from the entry by doc_ref
         """
-        self.conversation_history.append({
+        entry = {
             "role": role,
             "content": content,
-        })
+        }
+        tokens = self._estimate_tokens(f"{role}: {content}")
+        if document_state is not None:
+            doc_ref = len(self.conversation_history)
+            self._doc_snapshots[doc_ref] = document_state
+            entry["doc_ref"] = doc_ref
+            tokens += self._estimate_tokens(document_state)
+        self.context_manager.append_message(
+            self.conversation_history,
+            self.name,
+            entry,
+            self._doc_snapshots,
+            tokens=tokens,
+        )
+    
+    def _add_tool_turn(self, function_calls: list[types.FunctionCall], results: list[dict]) -> None:
+        """
+        Track a turn of tool calls in history.
+        
+        The chat session keeps every call and result, so they count toward
+        the context; results (often whole documents) are stored as the
+        entry's snapshot.
+        
+        Args:
+            function_calls: Calls the model made
+            results: Their results, in the same order
+        """
+        if not function_calls:
+            return
+        calls = "\n".join(f"{fc.name}({_dumps(dict(fc.args or {}))})" for fc in function_calls)
+        self._add_to_history("tool", calls, document_state="\n".join(_dumps(result) for result in results))
+    
+    def _get_system_prompt_tokens(self) -> int:
+        """Get the system prompt's token count, counting it only once."""
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = self.context_manager.count_text_tokens(self.system_prompt)
+        return self._system_prompt_tokens
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """
+        Count tokens locally if possible, otherwise estimate them from the
+        chars-per-token ratio measured on the system prompt.
+        """
+        if self.context_manager.has_local_tokenizer:
+            return self.context_manager.count_text_tokens(text)
+        chars_per_token = len(self.system_prompt) / max(1, self._get_system_prompt_tokens())
+        return int(len(text) / chars_per_token)
     
     def get_context_stats(self) -> dict:
         """Get current context statistics for this agent."""
-        return self.context_manager.get_context_stats(self.conversation_history)
+        return self.context_manager.get_context_stats(
+            self.conversation_history,
+            self.name,
+            static_tokens=self._get_system_prompt_tokens(),
+            doc_snapshots=self._doc_snapshots,
+        )
     
     def clear_history(self) -> None:
         """Clear conversation history (useful between major phases)."""
+        self.context_manager.release(self.name)
         self.conversation_history = []
+        self._doc_snapshots = {}
         self.memory_reminder = None
+        self._chat = None
     
     def call(
         self,
@@ -192,10 +561,34 @@ class EditorAgent:
         task_prompt: str,
         draft_num: int = 0,
         max_iterations: int = 20,
+    ) -> dict:
+        """
+        Synchronous wrapper around acall() for callers without an event loop.
+        
+        Args:
+            editor: DocumentEditor instance for the working document
+            task_prompt: Description of what the agent should do
+            draft_num: Current draft number
+            max_iterations: Maximum tool call iterations
+            
+        Returns:
+            Dict with results and edit summary
+        """
+        return asyncio.run(self.acall(editor, task_prompt, draft_num, max_iterations))
+    
+    async def acall(
+        self,
+        editor: DocumentEditor,
+        task_prompt: str,
+        draft_num: int = 0,
+        max_iterations: int = 20,
     ) -> dict:
         """
         Call the agent to perform edits on the document.
         
+        Uses the async Gemini client so sibling agents can be scheduled
+        concurrently with asyncio.gather.
+        
         Args:
             editor: DocumentEditor instance for the working document
             task_prompt: Description of what the agent should do
@@ -208,123 +601,133 @@ class EditorAgent:
         self.current_draft = draft_num
         
         # Check if context needs to be offloaded before this call
-        self._check_and_manage_context(draft_num)
+        await self.manage_context(draft_num)
         
-        # Always provide the full document so agents see what others changed
-        doc_content = editor.read_document_with_numbers()
-        line_count = editor.get_line_count()
+        # Built per call so an expired prompt cache is refreshed before sending
+        config = await self._cache.aconfig(
+            thinking_config=_THINKING_CONFIG,
+        )
         
-        if line_count == 0:
-            initial_context = "The document is currently EMPTY. You need to create the initial content."
-        else:
-            initial_context = f"""## CURRENT DOCUMENT STATE ({line_count} lines)
-
-{doc_content}
-
----
-END OF DOCUMENT"""
+        # Reuse this agent's chat session across calls. A fresh session has
+        # never seen the document, so the diff handshake starts over.
+        if self._chat is None:
+            self._chat = self.client.aio.chats.create(model=MODEL_NAME, config=config)
+            self._forget_document()
+            self._pending_responses = []
+        chat = self._chat
         
-        # Prepend memory reminder if context was previously offloaded
-        memory_prefix = ""
-        if self.memory_reminder:
-            memory_prefix = f"{self.memory_reminder}\n\n"
-            print(f"  [{self.name}] Including memory reminder from previous context")
+        line_count = editor.get_line_count()
+        initial_context, doc_mode = self._render_document_state(editor)
         
-        user_message = f"""{memory_prefix}{task_prompt}
-
-{initial_context}
-
-Use the editing tools to make your changes. Call editing_complete when done."""
+        # Build the message in tiers, most stable first, so only the trailing
+        # document state changes between turns:
+        #   1. memory reminder (stable for the whole draft after an offload)
+        #   2. task framing (stable for this call)
+        #   3. current document state (volatile)
+        # Answer the calls the session's last turn ended on before anything else
+        message_parts = self._pending_responses
+        self._pending_responses = []
+        if self.memory_reminder:
+            message_parts.append(types.Part.from_text(text=self.memory_reminder))
+            logger.info("  [%s] Including memory reminder from previous context", self.name)
+        message_parts.append(types.Part.from_text(
+            text=f"{task_prompt}\n\nUse the editing tools to make your changes. Call editing_complete when done."
+        ))
+        message_parts.append(types.Part.from_text(text=initial_context))
 
-        # Track this user message in history
-        self._add_to_history("user", user_message)
+        # Track the task and document state in history; the memory reminder is
+        # itself a summary of archived history, so it is not re-recorded
+        self._add_to_history("user", task_prompt, document_state=initial_context)
 
-        # Use a chat session for multi-turn function calling
-        chat = self.client.chats.create(
-            model=MODEL_NAME,
-            config=types.GenerateContentConfig(
-                system_instruction=self.system_prompt,
-                thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
-                tools=self.tools,
-            ),
-        )
-        
         edit_summary = []
         iterations = 0
         
         # Log context stats
         stats = self.get_context_stats()
-        print(f"\n  [{self.name}] INPUT:")
-        print(f"  Task: {task_prompt[:150]}...")
-        print(f"  Document: {line_count} lines (full content provided to agent)")
-        print(f"  Context: {stats['token_count']} tokens ({stats['percentage_used']:.1f}% of max)")
-        print(f"  [{self.name}] Starting document editing...")
+        logger.info("\n  [%s] INPUT:", self.name)
+        logger.info("  Task: %.150s...", task_prompt)
+        logger.info("  Document: %d lines (%s state provided to agent)", line_count, doc_mode)
+        logger.info("  Context: %d tokens (%.1f%% of max)", stats["token_count"], stats["percentage_used"])
+        logger.info("  [%s] Starting document editing...", self.name)
         
-        # Send initial message
-        response = chat.send_message(user_message)
+        message = message_parts
         
         while iterations < max_iterations:
             iterations += 1
             
-            # Check for function calls
-            has_function_call = False
+            # Stream the turn; tools start executing while it is still generating
+            function_calls, results, complete_call, skipped_calls, text = await self._stream_turn(
+                chat, message, editor, config
+            )
+            has_function_call = bool(function_calls) or complete_call is not None
+            
             function_responses = []
+            for fc, result in zip(function_calls, results):
+                # Log non-read operations
+                if fc.name not in READ_ONLY_TOOLS:
+                    logger.info("  [%s] %s: %s", self.name, fc.name, fc.args)
+                    edit_summary.append(f"{fc.name}")
+                
+                # Build function response
+                function_responses.append(
+                    types.FunctionResponse(
+                        name=fc.name,
+                        response=result,
+                    )
+                )
+            self._add_tool_turn(function_calls, results)
             
-            for part in response.candidates[0].content.parts:
-                if hasattr(part, 'function_call') and part.function_call:
-                    has_function_call = True
-                    fc = part.function_call
-                    
-                    # Execute the tool
-                    result = self._execute_tool(fc.name, dict(fc.args), editor)
-                    
-                    # Check if editing is complete
-                    if fc.name == "editing_complete":
-                        summary = fc.args.get("summary", "Edits complete")
-                        edit_summary.append(summary)
-                        print(f"  [{self.name}] {summary}")
-                        
-                        # Track assistant response in history
-                        self._add_to_history("assistant", f"[Completed editing] {summary}")
-                        
-                        # Clear memory reminder after successful use
-                        self.memory_reminder = None
-                        
-                        result_dict = {
-                            "success": True,
-                            "agent": self.name,
-                            "draft_num": draft_num,
-                            "iterations": iterations,
-                            "edit_summary": edit_summary,
-                            "context_stats": self.get_context_stats(),
-                        }
-                        print(f"\n  [{self.name}] OUTPUT:")
-                        print(f"  {result_dict}")
-                        return result_dict
-                    
-                    # Log non-read operations
-                    if fc.name not in ["read_document", "read_lines", "find_section"]:
-                        print(f"  [{self.name}] {fc.name}: {dict(fc.args)}")
-                        edit_summary.append(f"{fc.name}")
-                    
-                    # Build function response
-                    function_responses.append(
-                        types.FunctionResponse(
-                            name=fc.name,
-                            response={"result": result},
-                        )
+            # Check if editing is complete
+            if complete_call is not None:
+                summary = complete_call.args.get("summary", "Edits complete")
+                edit_summary.append(summary)
+                logger.info("  [%s] %s", self.name, summary)
+                
+                # The turn ends on function calls; their responses open the
+                # session's next message
+                function_responses.append(types.FunctionResponse(
+                    name=complete_call.name,
+                    response=await self._execute_tool(complete_call.name, dict(complete_call.args), editor),
+                ))
+                function_responses.extend(
+                    types.FunctionResponse(
+                        name=fc.name,
+                        response={"error": "Not run: called after editing_complete"},
                     )
+                    for fc in skipped_calls
+                )
+                self._pending_responses = [types.Part(function_response=fr) for fr in function_responses]
+                
+                # Track assistant response in history
+                self._add_to_history("assistant", f"[Completed editing] {summary}")
+                
+                # Clear memory reminder after successful use
+                self.memory_reminder = None
+                self._remember_document(editor)
+                
+                result_dict = {
+                    "success": True,
+                    "agent": self.name,
+                    "draft_num": draft_num,
+                    "iterations": iterations,
+                    "edit_summary": edit_summary,
+                    "context_stats": self.get_context_stats(),
+                }
+                logger.info("\n  [%s] OUTPUT:", self.name)
+                logger.info("  %s", result_dict)
+                return result_dict
             
             if not has_function_call:
                 # Model finished without calling editing_complete
-                text_response = response.text if response.text else "No response"
-                print(f"  [{self.name}] Finished: {text_response[:100]}...")
+                text_response = text if text else "No response"
+                logger.info("  [%s] Finished: %.100s...", self.name, text_response)
                 
                 # Track assistant response in history
                 self._add_to_history("assistant", text_response)
                 
                 # Clear memory reminder after successful use
                 self.memory_reminder = None
+                self._remember_document(editor)
                 
                 result_dict = {
                     "success": True,
@@ -335,20 +738,23 @@ Use the editing tools to make your changes. Call editing_complete when done."""
                     "final_message": text_response,
                     "context_stats": self.get_context_stats(),
                 }
-                print(f"\n  [{self.name}] OUTPUT:")
-                print(f"  {result_dict}")
+                logger.info("\n  [%s] OUTPUT:", self.name)
+                logger.info("  %s", result_dict)
                 return result_dict
             
-            # Send function responses back to continue the conversation
+            # Send function responses back on the next turn
             # Convert FunctionResponse objects to Part objects
-            parts = [types.Part(function_response=fr) for fr in function_responses]
-            response = chat.send_message(parts)
+            message = [types.Part(function_response=fr) for fr in function_responses]
         
-        print(f"  [{self.name}] Max iterations reached")
+        logger.warning("  [%s] Max iterations reached", self.name)
         
         # Track in history even on failure
         self._add_to_history("assistant", f"[Max iterations reached] Edits: {edit_summary}")
         
+        # The session ends on unanswered function calls, so it cannot be continued
+        self._chat = None
+        self._remember_document(editor)
+        
         result_dict = {
             "success": False,
             "agent": self.name,
@@ -358,6 +764,173 @@ Use the editing tools to make your changes. Call editing_complete when done."""
             "error": "Max iterations reached",
             "context_stats": self.get_context_stats(),
         }
-        print(f"\n  [{self.name}] OUTPUT:")
-        print(f"  {result_dict}")
+        logger.info("\n  [%s] OUTPUT:", self.name)
+        logger.info("  %s", result_dict)
         return result_dict
+    
+    async def submit_batch(self, tasks: list[tuple[DocumentEditor, str, int]]) -> str:
+        """
+        Queue non-interactive edit passes as a single Gemini batch job.
+        
+        Batch requests are single-turn: each one carries the full document
+        and the model emits all of its edits at once. Results arrive much
+        later, at roughly half the cost of interactive calls.
+        
+        Args:
+            tasks: List of (editor, task_prompt, draft_num) tuples
+            
+        Returns:
+            Batch job name, to pass to poll_batch()/wait_batch()
+        """
+        requests = []
+        for editor, task_prompt, draft_num in tasks:
+            if editor.get_line_count() == 0:
+                document_state = "The document is currently EMPTY. You need to create the initial content."
+            else:
+                document_state = self._full_document_state(editor)
+            
+            requests.append(types.InlinedRequest(
+                contents=[types.Content(role="user", parts=[
+                    types.Part.from_text(text=f"{task_prompt}\n\n{BATCH_EDIT_INSTRUCTIONS}"),
+                    types.Part.from_text(text=document_state),
+                ])],
+                # Jobs can sit in the queue past a cache TTL, so send the prompt inline
+                config=self._cache.build_config(
+                    None,
+                    thinking_config=_THINKING_CONFIG,
+                ),
+            ))
+            self._add_to_history("user", f"[Batch] {task_prompt}", document_state=document_state)
+        
+        job = await self.client.aio.batches.create(
+            model=MODEL_NAME,
+            src=requests,
+            config=types.CreateBatchJobConfig(display_name=f"{self.name.lower()}-edits"),
+        )
+        self._pending_batches[job.name] = tasks
+        logger.info("  [%s] Submitted batch job %s (%d request(s))", self.name, job.name, len(tasks))
+        return job.name
+    
+    async def poll_batch(self, job_name: str) -> Optional[list[dict]]:
+        """
+        Check a batch job and apply its edits once it has finished.
+        
+        Args:
+            job_name: Name returned by submit_batch()
+            
+        Returns:
+            One result dict per submitted task (same shape as acall()),
+            or None if the job is still running
+        """
+        job = await self.client.aio.batches.get(name=job_name)
+        if job.state not in BATCH_DONE_STATES:
+            return None
+        
+        tasks = self._pending_batches.pop(job_name, [])
+        responses = job.dest.inlined_responses if job.dest and job.dest.inlined_responses else []
+        
+        results = []
+        for i, (editor, _task_prompt, draft_num) in enumerate(tasks):
+            inlined = responses[i] if i < len(responses) else None
+            if inlined is None or inlined.error or not inlined.response:
+                error = str(inlined.error) if inlined and inlined.error else f"Batch job ended in {job.state}"
+                logger.warning("  [%s] Batch request %d failed: %s", self.name, i, error)
+                results.append({
+                    "success": False,
+                    "agent": self.name,
+                    "draft_num": draft_num,
+                    "iterations": 1,
+                    "edit_summary": [],
+                    "error": error,
+                    "batch_job": job_name,
+                    "context_stats": self.get_context_stats(),
+                })
+                continue
+            results.append(await self._apply_batch_response(inlined.response, editor, draft_num, job_name))
+        
+        return results
+    
+    async def wait_batch(
+        self,
+        job_name: str,
+        poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+    ) -> list[dict]:
+        """
+        Poll a batch job until it finishes and apply its edits.
+        
+        Args:
+            job_name: Name returned by submit_batch()
+            poll_interval: Seconds between status checks
+            
+        Returns:
+            One result dict per submitted task
+        """
+        while True:
+            results = await self.poll_batch(job_name)
+            if results is not None:
+                return results
+            await asyncio.sleep(poll_interval)
+    
+    async def _apply_batch_response(
+        self,
+        response: types.GenerateContentResponse,
+        editor: DocumentEditor,
+        draft_num: int,
+        job_name: str,
+    ) -> dict:
+        """
+        Replay the tool calls from a single-turn batch response on its editor.
+        
+        Args:
+            response: The model response for one batch request
+            editor: DocumentEditor the request was built from
+            draft_num: Draft number the request belongs to
+            job_name: Batch job the response came from
+            
+        Returns:
+            Result dict in the same shape as acall()
+        """
+        parts = response.candidates[0].content.parts if response.candidates else []
+        function_calls = [
+            part.function_call for part in parts or []
+            if hasattr(part, 'function_call') and part.function_call
+        ]
+        
+        complete_call = next(
+            (fc for fc in function_calls if fc.name == "editing_complete"), None
+        )
+        if complete_call is not None:
+            function_calls = function_calls[:function_calls.index(complete_call)]
+        
+        # Read-only calls are pointless here since results are never returned;
+        # the edits are known up front, so they are applied as one batch
+        edits = [fc for fc in function_calls if fc.name not in READ_ONLY_TOOLS]
+        async with editor.lock:
+            editor.apply_edits(
+                [{"operation": fc.name, **(fc.args or {})} for fc in edits],
+                agent=self.name,
+            )
+        
+        edit_summary = []
+        for fc in edits:
+            logger.info("  [%s] %s: %s", self.name, fc.name, fc.args)
+            edit_summary.append(f"{fc.name}")
+        
+        if complete_call is not None:
+            summary = complete_call.args.get("summary", "Edits complete")
+        else:
+            summary = response.text or "No response"
+        edit_summary.append(summary)
+        logger.info("  [%s] %s", self.name, summary)
+        
+        self._add_to_history("assistant", f"[Completed batch editing] {summary}")
+        
+        return {
+            "success": True,
+            "agent": self.name,
+            "draft_num": draft_num,
+            "iterations": 1,
+            "edit_summary": edit_summary,
+            "batch_job": job_name,
+            "context_stats": self.get_context_stats(),
+        }
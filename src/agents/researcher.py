@@ -8,15 +8,56 @@ This agent performs multi-turn tool calling to conduct thorough research:
 4. Compiles a comprehensive research brief
 """
 
+import asyncio
+import difflib
+import json
+import logging
+import re
+from typing import Optional
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+
+from ..config import (
+    MODEL_NAME,
+    THINKING_LEVEL_DISPATCH,
+    THINKING_LEVEL_SYNTHESIS,
+    SEARCH_CACHE_TTL_SECONDS,
+    RESEARCH_CACHE_ENABLED,
+    RESEARCH_CACHE_TTL_SECONDS,
+    RESEARCH_STRATEGY,
+    MAX_SEARCH_RESULT_CHARS,
+    RESEARCH_MODE,
+    BATCH_POLL_INTERVAL_SECONDS,
+)
+from ..logging_config import STREAM_LOGGER_NAME
+from ..context.prompt_cache import PromptCache
+from ..context.response_cache import ResponseCache, normalize_key
+from .editor_agent import BATCH_DONE_STATES
 
-from ..config import MODEL_NAME, THINKING_LEVEL
 
+logger = logging.getLogger("hollywoodai.researcher")
+stream_logger = logging.getLogger(STREAM_LOGGER_NAME)
 
 # Maximum number of research iterations to prevent infinite loops
 MAX_RESEARCH_ITERATIONS = 10
 
+# Searches requested in one turn run concurrently, each bounded by a timeout
+MAX_PARALLEL_SEARCHES = 8
+SEARCH_TIMEOUT_SECONDS = 30
+
+# Search results from earlier turns are cut down to head + tail in the
+# resent history; only the latest round is kept in full
+HISTORY_RESULT_HEAD_CHARS = 500
+HISTORY_RESULT_TAIL_CHARS = 200
+
+# Queries whose sorted-word forms are at least this similar to an earlier
+# query in the same run reuse its result instead of searching again
+QUERY_SIMILARITY_THRESHOLD = 0.88
+
+# Number of queries requested from the planning call
+MIN_PLANNED_QUERIES = 3
+MAX_PLANNED_QUERIES = 6
+
 
 RESEARCHER_SYSTEM_PROMPT = """You are a thorough research assistant preparing background material for a screenwriting team.
 
@@ -79,24 +120,40 @@ Be concise but thorough. Focus on information that directly helps create a compe
 IMPORTANT: You MUST use the google_search tool multiple times before writing your final brief. Do not skip the research phase."""
 
 
-# Tool declaration for the researcher's search capability
-SEARCH_TOOL = types.Tool(
-    function_declarations=[
-        types.FunctionDeclaration(
-            name="google_search",
-            description="Search the web for information relevant to the story research. Use specific, targeted queries.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "query": types.Schema(
-                        type=types.Type.STRING,
-                        description="The search query to execute. Be specific and targeted.",
-                    ),
-                },
-                required=["query"],
-            ),
+# Function declarations the researcher can be offered, by name. Each turn
+# sends only the subset chosen by ResearcherAgent._select_tools.
+TOOL_REGISTRY = {
+    "google_search": types.FunctionDeclaration(
+        name="google_search",
+        description="Search the web for information relevant to the story research. Use specific, targeted queries.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "query": types.Schema(
+                    type=types.Type.STRING,
+                    description="The search query to execute. Be specific and targeted.",
+                ),
+            },
+            required=["query"],
         ),
-    ]
+    ),
+}
+
+# Tool declaration for the researcher's search capability
+SEARCH_TOOL = types.Tool(function_declarations=[TOOL_REGISTRY["google_search"]])
+
+
+# Thinking configs shared by every research request
+DISPATCH_THINKING = types.ThinkingConfig(thinking_level=THINKING_LEVEL_DISPATCH)
+SYNTHESIS_THINKING = types.ThinkingConfig(thinking_level=THINKING_LEVEL_SYNTHESIS)
+
+
+# Grounded search request, built once and shared by every search
+SEARCH_PROMPT_PREFIX = "Search and summarize key information about: "
+_SEARCH_CONFIG = types.GenerateContentConfig(
+    system_instruction=types.Content(parts=[types.Part(text="You are a search assistant. Provide a concise summary of the most relevant information found. Include specific facts, dates, names, and details that would be useful for research.")]),
+    tools=[types.Tool(google_search=types.GoogleSearch())],
+    thinking_config=DISPATCH_THINKING,
 )
 
 
@@ -123,10 +180,55 @@ class ResearcherAgent:
         """
         self.name = "Researcher"
         self.system_prompt = RESEARCHER_SYSTEM_PROMPT
+        
+        # Tool-free request that writes the brief, built once with the
+        # system prompt already wrapped as a Content
+        self._synthesis_config = types.GenerateContentConfig(
+            system_instruction=types.Content(parts=[types.Part(text=self.system_prompt)]),
+            thinking_config=SYNTHESIS_THINKING,
+        )
         self.client = client
         self.search_results: list[dict] = []  # Track all searches performed
+        self.strategy = RESEARCH_STRATEGY  # "plan" or "iterative"
+        
+        # Grounded search results, reused across runs
+        self.search_cache = ResponseCache("search_cache", SEARCH_CACHE_TTL_SECONDS)
+        
+        # Complete results of call(), keyed by story prompt
+        self.research_cache = (
+            ResponseCache("research_cache", RESEARCH_CACHE_TTL_SECONDS)
+            if RESEARCH_CACHE_ENABLED else None
+        )
+        
+        # System prompt + offered tools are static per tool set, so each set
+        # is uploaded once as a context cache, keyed by tool names
+        self._prompt_caches: dict[tuple[str, ...], PromptCache] = {}
+        self.cached_tokens = 0  # Prompt tokens served from the cache this run
+        
+        # Results of this run's searches by normalized query, for skipping
+        # repeated and near-duplicate queries
+        self._session_queries: dict[str, str] = {}
+    
+    def _store_search_result(self, cache_key: str, result: str) -> str:
+        """
+        Cap a fresh search result and add it to the search cache.
+        
+        Args:
+            cache_key: normalize_key() of the query
+            result: Grounded search summary
+            
+        Returns:
+            The result as stored
+        """
+        logger.info("    ✓ Found %d chars of information", len(result))
+        if len(result) > MAX_SEARCH_RESULT_CHARS:
+            # Every result is held in search history and resent on each
+            # later turn, so oversized summaries are capped here
+            result = f"{result[:MAX_SEARCH_RESULT_CHARS]}\n[... truncated ...]"
+        self.search_cache.put(cache_key, result)
+        return result
     
-    def _execute_search(self, query: str) -> str:
+    async def _execute_search(self, query: str) -> str:
         """
         Execute a web search using Gemini's grounded search.
         
@@ -136,114 +238,458 @@ class ResearcherAgent:
         Returns:
             Search results as text
         """
-        print(f"    🔍 Searching: '{query}'")
+        cache_key = normalize_key(query)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.info("    ⚡ Cached: '%s'", query)
+            return cached
+        
+        logger.info("    🔍 Searching: '%s'", query)
         
         try:
             # Use Gemini with Google Search grounding for the actual search
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=MODEL_NAME,
-                contents=f"Search and summarize key information about: {query}",
-                config=types.GenerateContentConfig(
-                    system_instruction="You are a search assistant. Provide a concise summary of the most relevant information found. Include specific facts, dates, names, and details that would be useful for research.",
-                    tools=[types.Tool(google_search=types.GoogleSearch())],
-                ),
+                contents=SEARCH_PROMPT_PREFIX + query,
+                config=_SEARCH_CONFIG,
             )
-            result = response.text
-            print(f"    ✓ Found {len(result)} chars of information")
-            return result
+            return self._store_search_result(cache_key, response.text or "")
             
         except Exception as e:
             error_msg = f"Search failed: {e}"
-            print(f"    ✗ {error_msg}")
+            logger.warning("    ✗ %s", error_msg)
             return error_msg
     
-    def _process_tool_calls(self, response) -> list[types.Part]:
+    async def _run_searches(self, queries: list[str], batch: bool = False) -> list[str]:
         """
-        Process function calls from the model response.
+        Execute searches and record them in search_results.
+        
+        Queries that repeat, or nearly repeat, an earlier query from this
+        run reuse its result without searching again.
         
         Args:
-            response: The model response that may contain function calls
+            queries: Search queries
+            batch: Send the searches as one Batch API job instead of
+                running them concurrently
             
         Returns:
-            List of FunctionResponse parts to send back
+            Search results in the same order as queries
+        """
+        to_search = []
+        keys = []  # Session key answering each query
+        for query in queries:
+            norm = self._normalize_query(query)
+            match = self._match_session_query(norm)
+            if match is None:
+                self._session_queries[norm] = ""  # Claimed; filled in below
+                to_search.append(query)
+                keys.append(norm)
+            else:
+                logger.info("    ↺ Skipping duplicate search: '%s'", query)
+                keys.append(match)
+        
+        answers = {}
+        if to_search:
+            if batch:
+                results = await self._search_in_batch(to_search)
+            else:
+                results = await self._search_concurrently(to_search)
+            for query, result in zip(to_search, results):
+                norm = self._normalize_query(query)
+                answers[norm] = result
+                if result.startswith("Search failed"):
+                    # Let a later turn try this query again
+                    del self._session_queries[norm]
+                else:
+                    self._session_queries[norm] = result
+            self._record_searches(to_search, results)
+        
+        return [answers[key] if key in answers else self._session_queries[key] for key in keys]
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Reduce a query to its sorted lowercase words."""
+        return " ".join(sorted(re.sub(r"[^\w\s]", " ", query.lower()).split()))
+    
+    def _match_session_query(self, norm: str) -> Optional[str]:
+        """
+        Find an earlier query from this run that a new one duplicates.
+        
+        Args:
+            norm: Normalized new query (see _normalize_query)
+            
+        Returns:
+            Session key of the matching query, or None
+        """
+        if norm in self._session_queries:
+            return norm
+        for existing in self._session_queries:
+            if difflib.SequenceMatcher(None, norm, existing).ratio() >= QUERY_SIMILARITY_THRESHOLD:
+                return existing
+        return None
+    
+    async def _search_concurrently(self, queries: list[str]) -> list[str]:
+        """
+        Execute searches concurrently, each bounded by a timeout.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            Search results in the same order as queries
+        """
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_SEARCHES)
+        
+        async def search(query: str) -> str:
+            # One slow search must not hold up the others
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self._execute_search(query), SEARCH_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("    ✗ '%s' timed out", query)
+                    return f"Search failed: timed out after {SEARCH_TIMEOUT_SECONDS}s"
+        
+        return await asyncio.gather(*(search(query) for query in queries))
+    
+    async def _search_in_batch(self, queries: list[str]) -> list[str]:
+        """
+        Execute uncached searches as one Batch API job.
+        
+        Polls until the job finishes, which can take minutes. Requests the
+        job could not complete are retried interactively.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            Search results in the same order as queries
+        """
+        results: list[str] = [""] * len(queries)
+        pending = []  # (index, query, cache_key) sent in the batch
+        for i, query in enumerate(queries):
+            cache_key = normalize_key(query)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                logger.info("    ⚡ Cached: '%s'", query)
+                results[i] = cached
+            else:
+                pending.append((i, query, cache_key))
+        
+        if pending:
+            job = await self.client.aio.batches.create(
+                model=MODEL_NAME,
+                src=[
+                    types.InlinedRequest(contents=SEARCH_PROMPT_PREFIX + query, config=_SEARCH_CONFIG)
+                    for _, query, _ in pending
+                ],
+                config=types.CreateBatchJobConfig(display_name="research-searches"),
+            )
+            logger.info("    Submitted batch job %s (%d search(es)), polling every %ds", job.name, len(pending), BATCH_POLL_INTERVAL_SECONDS)
+            while job.state not in BATCH_DONE_STATES:
+                await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+                job = await self.client.aio.batches.get(name=job.name)
+            
+            responses = job.dest.inlined_responses if job.dest and job.dest.inlined_responses else []
+            retry = []
+            for n, (i, query, cache_key) in enumerate(pending):
+                inlined = responses[n] if n < len(responses) else None
+                if inlined is None or inlined.error or not inlined.response:
+                    retry.append((i, query))
+                    continue
+                logger.info("    🔍 Batched: '%s'", query)
+                results[i] = self._store_search_result(cache_key, inlined.response.text or "")
+            
+            if retry:
+                logger.warning("    %d batched search(es) failed, retrying interactively", len(retry))
+                retried = await asyncio.gather(*(self._execute_search(query) for _, query in retry))
+                for (i, _), result in zip(retry, retried):
+                    results[i] = result
+        
+        return results
+    
+    def _record_searches(self, queries: list[str], results: list[str]) -> None:
+        """Track performed searches for the research summary."""
+        for query, result in zip(queries, results):
+            self.search_results.append({
+                "query": query,
+                "result_preview": f"{result[:200]}..." if len(result) > 200 else result,
+            })
+    
+    def _parse_response(self, response) -> tuple[list[types.FunctionCall], list[str]]:
         """
-        function_responses = []
+        Collect the function calls and search queries in one pass over the parts.
         
-        for candidate in response.candidates:
-            for part in candidate.content.parts:
-                if part.function_call:
-                    fc = part.function_call
+        Args:
+            response: The model response that may contain function calls
+            
+        Returns:
+            Tuple of (all function calls, non-empty google_search queries)
+        """
+        function_calls = []
+        queries = []
+        for candidate in response.candidates or []:
+            for part in candidate.content.parts or []:
+                fc = part.function_call
+                if fc:
+                    function_calls.append(fc)
                     if fc.name == "google_search":
                         query = fc.args.get("query", "")
                         if query:
-                            # Execute the search
-                            result = self._execute_search(query)
-                            
-                            # Track this search
-                            self.search_results.append({
-                                "query": query,
-                                "result_preview": result[:200] + "..." if len(result) > 200 else result,
-                            })
-                            
-                            # Create function response
-                            function_responses.append(
-                                types.Part.from_function_response(
-                                    name="google_search",
-                                    response={"result": result},
-                                )
-                            )
-        
-        return function_responses
+                            queries.append(query)
+        return function_calls, queries
     
-    def _has_function_calls(self, response) -> bool:
-        """Check if the response contains function calls."""
-        for candidate in response.candidates:
-            for part in candidate.content.parts:
-                if part.function_call:
-                    return True
-        return False
+    async def _process_tool_calls(self, queries: list[str]) -> list[types.Part]:
+        """
+        Run the searches from one model turn.
+        
+        All searches requested in the turn run concurrently; responses are
+        returned in the order the model made the calls.
+        
+        Args:
+            queries: Search queries from _parse_response
+            
+        Returns:
+            List of FunctionResponse parts to send back
+        """
+        return [
+            types.Part.from_function_response(
+                name="google_search",
+                response={"result": result},
+            )
+            for result in await self._run_searches(queries)
+        ]
+    
+    def _compact_search_history(self, contents: list) -> None:
+        """
+        Shorten the previous round of search results in place.
+        
+        Every turn resends the whole history, so without this the payload
+        grows quadratically with iterations. Call after appending each new
+        round: the round before it (model turn in between) is cut to head +
+        tail once, so the compacted prefix stays identical on later turns
+        and only the latest round is sent in full.
+        
+        Args:
+            contents: Research conversation history
+        """
+        if len(contents) < 3:
+            return
+        content = contents[-3]
+        if not isinstance(content, types.Content) or content.role != "user":
+            return
+        
+        limit = HISTORY_RESULT_HEAD_CHARS + HISTORY_RESULT_TAIL_CHARS
+        for i, part in enumerate(content.parts or []):
+            fr = part.function_response
+            if fr is None:
+                continue
+            result = (fr.response or {}).get("result", "")
+            if len(result) <= limit:
+                continue
+            omitted = len(result) - limit
+            content.parts[i] = types.Part.from_function_response(
+                name=fr.name,
+                response={"result": (
+                    f"{result[:HISTORY_RESULT_HEAD_CHARS]}\n"
+                    f"[... {omitted} chars omitted ...]\n"
+                    f"{result[-HISTORY_RESULT_TAIL_CHARS:]}"
+                )},
+            )
+    
+    async def _plan_queries(self, user_prompt: str) -> list[str]:
+        """
+        Ask the model for every search query up front in one structured call.
+        
+        Args:
+            user_prompt: The user's story prompt/request
+            
+        Returns:
+            Distinct search queries, at most MAX_PLANNED_QUERIES
+        """
+        response = await self.client.aio.models.generate_content(
+            model=MODEL_NAME,
+            contents=f"""Plan the web research for this short film concept.
+
+STORY REQUEST:
+{user_prompt}
+
+Return a JSON list of {MIN_PLANNED_QUERIES}-{MAX_PLANNED_QUERIES} specific search queries, each exploring a different angle:
+setting or subject matter, genre conventions, technical or factual details, cultural context, and similar successful works.""",
+            config=types.GenerateContentConfig(
+                thinking_config=DISPATCH_THINKING,
+                response_mime_type="application/json",
+                response_schema=types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING),
+                ),
+            ),
+        )
+        
+        queries = []
+        for query in json.loads(response.text or "[]"):
+            query = str(query).strip()
+            if query and query not in queries:
+                queries.append(query)
+        return queries[:MAX_PLANNED_QUERIES]
+    
+    async def _research_planned(self, user_prompt: str) -> tuple[str, int, int]:
+        """
+        Research in two model calls: plan all queries, search them
+        concurrently, then synthesize the brief once.
+        
+        Args:
+            user_prompt: The user's story prompt/request
+            
+        Returns:
+            Tuple of (research brief, model calls made, searches requested)
+        """
+        logger.info("\n  [%s] Planning searches...", self.name)
+        queries = await self._plan_queries(user_prompt)
+        if not queries:
+            logger.info("  [%s] No queries planned, falling back to iterative research", self.name)
+            return await self._research_iterative(user_prompt)
+        logger.info("    Model planned %d search(es)", len(queries))
+        
+        results = await self._run_searches(queries, batch=RESEARCH_MODE == "batch")
+        findings = "\n\n".join(
+            f"### Search: {query}\n{result}" for query, result in zip(queries, results)
+        )
+        
+        logger.info("\n  [%s] Synthesizing research brief...", self.name)
+        research_text = await self._stream_text(
+            contents=f"""STORY REQUEST:
+{user_prompt}
+
+The searches below have already been performed for you. Compile their findings into the final Research Brief format. Do not request any more searches.
+
+{findings}""",
+            config=self._synthesis_config,
+        )
+        if research_text:
+            logger.info("    ✓ Research complete after %d searches", len(self.search_results))
+        return research_text, 2, len(queries)
+    
+    def _select_tools(self, iteration: int) -> tuple[str, ...]:
+        """
+        Choose which registered tools to offer on a research turn.
+        
+        Args:
+            iteration: 1-based research iteration
+            
+        Returns:
+            Names of the TOOL_REGISTRY entries to send
+        """
+        if iteration >= MAX_RESEARCH_ITERATIONS:
+            # Last turn: without tools the model has to write the brief
+            return ()
+        return tuple(TOOL_REGISTRY)
+    
+    def _get_prompt_cache(self, tool_names: tuple[str, ...]) -> PromptCache:
+        """Get the context cache for the system prompt plus the given tools."""
+        cache = self._prompt_caches.get(tool_names)
+        if cache is None:
+            tools = None
+            if tool_names:
+                tools = [types.Tool(function_declarations=[
+                    TOOL_REGISTRY[name] for name in tool_names
+                ])]
+            cache = PromptCache(self.client, self.system_prompt, tools=tools)
+            self._prompt_caches[tool_names] = cache
+        return cache
+    
+    async def _generate_with_tools(
+        self,
+        contents: list,
+        tool_names: tuple[str, ...],
+    ) -> types.GenerateContentResponse:
+        """
+        Run one research turn offering the given tools.
+        
+        The system prompt and tools come from the context cache when one is
+        available. If the provider has already dropped the cache, it is
+        recreated and the turn retried once.
+        
+        Args:
+            contents: Conversation so far
+            tool_names: TOOL_REGISTRY entries to offer (see _select_tools)
+            
+        Returns:
+            The model response
+        """
+        prompt_cache = self._get_prompt_cache(tool_names)
+        config = await prompt_cache.aconfig(thinking_config=DISPATCH_THINKING)
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=contents,
+                config=config,
+            )
+        except errors.ClientError as e:
+            if e.code != 404 or not config.cached_content:
+                raise
+            logger.info("  [%s] Prompt cache expired, recreating", self.name)
+            prompt_cache.invalidate()
+            response = await self.client.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=contents,
+                config=await prompt_cache.aconfig(thinking_config=DISPATCH_THINKING),
+            )
+        
+        if response.usage_metadata:
+            self.cached_tokens += response.usage_metadata.cached_content_token_count or 0
+        return response
+    
+    async def _stream_text(self, contents, config: types.GenerateContentConfig) -> str:
+        """
+        Generate a text-only response, echoing it as it streams in.
+        
+        Args:
+            contents: Request contents
+            config: Request config (without tools)
+            
+        Returns:
+            The full response text
+        """
+        chunks = []
+        stream = await self.client.aio.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=contents,
+            config=config,
+        )
+        async for chunk in stream:
+            if chunk.text:
+                chunks.append(chunk.text)
+                stream_logger.info("%s", chunk.text)
+        if chunks:
+            stream_logger.info("\n")
+        return "".join(chunks)
     
     def _get_text_response(self, response) -> str:
-        """Extract text from the response."""
+        """Extract text from the response ("" if it has none)."""
+        # response.text joins the first candidate's text parts and is None
+        # when there are none
         try:
-            for candidate in response.candidates:
-                for part in candidate.content.parts:
-                    if part.text:
-                        return part.text
-        except Exception:
+            return response.text or ""
+        except (AttributeError, ValueError):
             return ""
     
-    def call(self, input_data: dict) -> dict:
+    async def _research_iterative(self, user_prompt: str) -> tuple[str, int, int]:
         """
-        Conduct iterative web research for the story concept.
+        Research through multi-turn tool calling.
         
-        This method performs multi-turn tool calling:
         1. Sends the research request to the model
         2. Model decides what to search for and calls google_search
         3. We execute the search and return results
         4. Repeat until model provides final research brief
         
         Args:
-            input_data: Dict containing:
-                - "message": The user's story prompt/request
-                
+            user_prompt: The user's story prompt/request
+            
         Returns:
-            Dict with research brief
+            Tuple of (research brief, iterations run, function calls executed)
         """
-        user_prompt = input_data.get("message", "")
-        
-        if not user_prompt:
-            return {
-                "response": "",
-                "research": "",
-                "agent": self.name,
-                "draft_num": 0,
-                "searches_performed": 0,
-            }
-        
-        # Reset search tracking
-        self.search_results = []
-        
         # Build the initial research request
         initial_request = f"""Research the following story concept to help a screenwriting team create an authentic short film:
 
@@ -260,97 +706,145 @@ Remember to search for multiple aspects:
 
 After gathering enough information through multiple searches, compile a comprehensive Research Brief."""
 
-        print(f"\n  [{self.name}] Starting iterative research...")
-        print(f"  Story concept: {user_prompt[:200]}...")
+        # Initialize conversation history
+        contents = [initial_request]
         
-        try:
-            # Initialize conversation history
-            contents = [initial_request]
+        iteration = 0
+        research_text = ""
+        total_function_calls = 0
+        
+        while iteration < MAX_RESEARCH_ITERATIONS:
+            iteration += 1
+            logger.info("\n  [%s] Iteration %d/%d", self.name, iteration, MAX_RESEARCH_ITERATIONS)
             
-            iteration = 0
-            research_text = ""
-            total_function_calls = 0
+            # Generate response
+            response = await self._generate_with_tools(contents, self._select_tools(iteration))
             
-            while iteration < MAX_RESEARCH_ITERATIONS:
-                iteration += 1
-                print(f"\n  [{self.name}] Iteration {iteration}/{MAX_RESEARCH_ITERATIONS}")
+            # Check if model wants to call tools
+            function_calls, queries = self._parse_response(response)
+            if function_calls:
+                logger.info("    Model requesting %d search(es)...", len(function_calls))
                 
-                # Generate response
-                response = self.client.models.generate_content(
-                    model=MODEL_NAME,
-                    contents=contents,
-                    config=types.GenerateContentConfig(
-                        system_instruction=self.system_prompt,
-                        thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
-                        tools=[SEARCH_TOOL],
-                    ),
-                )
+                # Add model's response to history
+                contents.append(response.candidates[0].content)
                 
-                # Check if model wants to call tools
-                if self._has_function_calls(response):
-                    # Count function calls in this iteration
-                    num_calls = sum(
-                        1 for candidate in response.candidates
-                        for part in candidate.content.parts
-                        if part.function_call
-                    )
-                    print(f"    Model requesting {num_calls} search(es)...")
-                    
-                    # Add model's response to history
-                    contents.append(response.candidates[0].content)
-                    
-                    # Process tool calls and get results
-                    function_responses = self._process_tool_calls(response)
-                    
-                    total_function_calls += len(function_responses)
-                    print(f"    Executed {len(function_responses)} function call(s) this iteration (total: {total_function_calls})")
-                    
-                    if function_responses:
-                        # Add function responses to history
-                        contents.append(types.Content(
-                            role="user",
-                            parts=function_responses,
-                        ))
-                    
-                else:
-                    # Model provided final text response
-                    research_text = self._get_text_response(response)
-                    if research_text:
-                        print(f"    ✓ Research complete after {len(self.search_results)} searches")
-                        break
-            
-            # If we hit max iterations without a final response
-            if not research_text:
-                print(f"  [{self.name}] Max iterations reached, requesting final brief...")
+                # Process tool calls and get results
+                function_responses = await self._process_tool_calls(queries)
+                
+                total_function_calls += len(function_responses)
+                logger.info("    Executed %d function call(s) this iteration (total: %d)", len(function_responses), total_function_calls)
                 
-                # Ask for final compilation
-                contents.append(
-                    "You have completed your searches. Now compile all the information you've gathered into the final Research Brief format. Do not make any more searches."
-                )
+                if function_responses:
+                    # Add function responses to history
+                    contents.append(types.Content(
+                        role="user",
+                        parts=function_responses,
+                    ))
+                    self._compact_search_history(contents)
                 
-                response = self.client.models.generate_content(
-                    model=MODEL_NAME,
-                    contents=contents,
-                    config=types.GenerateContentConfig(
-                        system_instruction=self.system_prompt,
-                        thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
-                        # No tools - force text output
-                    ),
-                )
+            else:
+                # Model provided final text response
                 research_text = self._get_text_response(response)
+                if research_text:
+                    logger.info("    ✓ Research complete after %d searches", len(self.search_results))
+                    break
+        
+        # If we hit max iterations without a final response
+        if not research_text:
+            logger.info("  [%s] Max iterations reached, requesting final brief...", self.name)
             
+            # Ask for final compilation
+            contents.append(
+                "You have completed your searches. Now compile all the information you've gathered into the final Research Brief format. Do not make any more searches."
+            )
+            
+            # No tools - force text output. The cached prefix includes the
+            # tool, so this one call sends the prompt inline.
+            research_text = await self._stream_text(
+                contents=contents,
+                config=self._synthesis_config,
+            )
+        
+        return research_text, iteration, total_function_calls
+    
+    def call(self, input_data: dict) -> dict:
+        """
+        Synchronous wrapper around acall() for callers without an event loop.
+        
+        Args:
+            input_data: Dict containing:
+                - "message": The user's story prompt/request
+                
+        Returns:
+            Dict with research brief
+        """
+        return asyncio.run(self.acall(input_data))
+    
+    async def acall(self, input_data: dict) -> dict:
+        """
+        Conduct web research for the story concept.
+        
+        With the "plan" strategy the model plans every query in one call and
+        writes the brief in a second; with "iterative" it searches turn by turn.
+        
+        Args:
+            input_data: Dict containing:
+                - "message": The user's story prompt/request
+                
+        Returns:
+            Dict with research brief
+        """
+        user_prompt = input_data.get("message", "")
+        
+        if not user_prompt:
+            return {
+                "response": "",
+                "research": "",
+                "agent": self.name,
+                "draft_num": 0,
+                "searches_performed": 0,
+            }
+        
+        # Identical story prompts reuse the earlier research
+        cache_key = normalize_key(user_prompt)
+        if self.research_cache is not None:
+            cached = self.research_cache.get(cache_key)
+            if cached is not None:
+                result = json.loads(cached)
+                logger.info("\n  [%s] Using cached research (%d searches, %d chars)", self.name, result['searches_performed'], len(result['research']))
+                return result
+        
+        # Reset search tracking
+        self.search_results = []
+        self.cached_tokens = 0
+        self._session_queries = {}
+        
+        logger.info("\n  [%s] Starting %s research...", self.name, self.strategy)
+        logger.info("  Story concept: %.200s...", user_prompt)
+        
+        iteration = 0
+        total_function_calls = 0
+        failed = False
+        try:
+            if self.strategy == "plan":
+                research_text, iteration, total_function_calls = await self._research_planned(user_prompt)
+            else:
+                research_text, iteration, total_function_calls = await self._research_iterative(user_prompt)
         except Exception as e:
-            print(f"  [{self.name}] Research failed ({e}), continuing without research")
+            logger.warning("  [%s] Research failed (%s), continuing without research", self.name, e)
             research_text = f"[Research unavailable - error: {e}]"
+            failed = True
         
         # Log summary
-        print(f"\n  [{self.name}] RESEARCH SUMMARY:")
-        print(f"  Total iterations: {iteration}")
-        print(f"  Total function calls: {total_function_calls}")
-        print(f"  Total searches: {len(self.search_results)}")
+        logger.info("\n  [%s] RESEARCH SUMMARY:", self.name)
+        logger.info("  Total iterations: %d", iteration)
+        logger.info("  Total function calls: %d", total_function_calls)
+        logger.info("  Total searches: %d", len(self.search_results))
+        logger.info("  Search cache: %d hit(s), %d miss(es)", self.search_cache.stats['hits'], self.search_cache.stats['misses'])
+        logger.info("  Cached prompt tokens: %d", self.cached_tokens)
         for i, search in enumerate(self.search_results, 1):
-            print(f"    {i}. '{search['query']}'")
-        print(f"  Brief length: {len(research_text)} chars")
+            logger.info("    %d. '%s'", i, search['query'])
+        logger.info("  Brief length: %d chars", len(research_text))
         
         result = {
             "response": research_text,
@@ -361,4 +855,7 @@ After gathering enough information through multiple searches, compile a comprehe
             "search_queries": [s["query"] for s in self.search_results],
         }
         
+        if self.research_cache is not None and research_text and not failed:
+            self.research_cache.put(cache_key, json.dumps(result))
+        
         return result
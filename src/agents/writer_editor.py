@@ -2,42 +2,102 @@
 Writer Editor Agent - Creates and revises the narrative using document editing tools.
 """
 
+import asyncio
+import json
+import logging
+from typing import Optional
+
 from google import genai
+from google.genai import types
 
 from .editor_agent import EditorAgent
+from ._shared_prompts import REPLACE_RULE
+from ..config import (
+    MODEL_NAME,
+    FAST_MODEL_NAME,
+    THINKING_LEVEL,
+    TARGET_RUNTIME_MINUTES,
+    PARALLEL_SCENE_DRAFTING,
+)
 from ..context.manager import ContextManager
-
-
-WRITER_EDITOR_PROMPT = """You are a master screenwriter editing a working draft document.
+from ..context.prompt_cache import PromptCache
+
+
+logger = logging.getLogger("hollywoodai.agent")
+
+# Scene plans this short are written in one editing session instead
+MIN_PARALLEL_SCENES = 3
+MAX_PARALLEL_SCENES = 6  # Concurrent scene-writing calls
+
+
+# Structured outline returned by the planning call
+SCENE_PLAN_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "title": types.Schema(type=types.Type.STRING),
+        "genre": types.Schema(type=types.Type.STRING),
+        "tone": types.Schema(type=types.Type.STRING),
+        "logline": types.Schema(type=types.Type.STRING),
+        "theme": types.Schema(type=types.Type.STRING),
+        "story_arc": types.Schema(type=types.Type.STRING),
+        "characters": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+        ),
+        "emotional_journey": types.Schema(type=types.Type.STRING),
+        "goal": types.Schema(type=types.Type.STRING),
+        "scenes": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "title": types.Schema(type=types.Type.STRING),
+                    "location": types.Schema(type=types.Type.STRING),
+                    "time": types.Schema(type=types.Type.STRING),
+                    "beat": types.Schema(type=types.Type.STRING),
+                },
+                required=["title", "location", "time", "beat"],
+            ),
+        ),
+    },
+    required=[
+        "title", "genre", "tone", "logline", "theme", "story_arc",
+        "characters", "emotional_journey", "goal", "scenes",
+    ],
+)
+
+SCENE_WRITER_INSTRUCTION = """You are a master screenwriter writing ONE scene of a short film from an agreed outline.
+Write only the scene's narrative and dialogue in markdown - no scene heading, location or time lines, and no [VISUAL] or [AUDIO] tags.
+Stay consistent with the characters and the beats of the neighbouring scenes. Avoid plot holes: characters share obvious information and take obvious solutions."""
+
+_PLAN_CONFIG = types.GenerateContentConfig(
+    thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
+    response_mime_type="application/json",
+    response_schema=SCENE_PLAN_SCHEMA,
+)
+
+_SCENE_CONFIG = types.GenerateContentConfig(
+    system_instruction=types.Content(parts=[types.Part(text=SCENE_WRITER_INSTRUCTION)]),
+    thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
+)
+
+
+WRITER_EDITOR_PROMPT = f"""{REPLACE_RULE}
+
+You are a master screenwriter editing a working draft document.
 
 ## Your Role:
 - Create and refine narrative structure, scenes, and dialogue
 - Make TARGETED edits - don't rewrite everything, just what needs changing
 - Preserve existing [VISUAL] and [AUDIO] tags when editing (other agents added those)
 
-## CRITICAL EDITING RULE - ALWAYS DELETE OLD CONTENT WHEN REVISING:
-When you modify, improve, or revise ANY existing content:
-- Use `replace_lines` to swap old content with new content (this deletes AND inserts in one operation)
-- OR use `delete_lines` first, THEN `insert_lines` to add the replacement
-- NEVER just insert new content below/above old content without deleting the original
-- If you're improving a line, the OLD line must be REMOVED, not left in place
-
-WRONG (creates duplicates):
-  Line 50: "He walks slowly."
-  → insert_lines(after_line=50, content="He strides purposefully.")
-  Result: BOTH lines exist (BROKEN!)
-
-CORRECT (replaces properly):
-  Line 50: "He walks slowly."
-  → replace_lines(start=50, end=50, content="He strides purposefully.")
-  Result: Only the new line exists (CORRECT!)
-
 ## For FIRST DRAFT (empty document):
-Use insert_lines with after_line=0 to create the initial story structure:
+Build the story with one insert_lines call per section, each using after_line=-1 to append, in this order:
 1. Title and metadata
 2. STORY OVERVIEW section (logline, theme, arc, characters, emotional journey, goal)
-3. SCENE sections with narrative, dialogue, and scene breaks
+3. Each SCENE section with narrative, dialogue, and scene break (one call per scene)
 4. Production Notes at the end
+Issue all of these calls in the same turn. Each section is written to the document as soon as you finish it.
 
 ## For REVISIONS:
 1. First, read the document to understand current state
@@ -97,21 +157,217 @@ class WriterEditorAgent(EditorAgent):
             client=client,
             context_manager=context_manager,
         )
+        
+        # Research brief for the current story, part of the cached system prompt
+        self.research = ""
+    
+    async def set_research(self, research: str) -> None:
+        """
+        Make the research brief part of the Writer's cached system prompt.
+        
+        Every later call, revisions included, then sees the brief without it
+        being resent in each task. The cache holding the old prompt is
+        deleted.
+        
+        Args:
+            research: Research brief, may be empty
+        """
+        self.research = research
+        self.system_prompt = (
+            f"{WRITER_EDITOR_PROMPT}\n\n## RESEARCH BRIEF\n\n{research}" if research else WRITER_EDITOR_PROMPT
+        )
+        await self._cache.adelete()
+        self._cache = PromptCache(self.client, self.system_prompt, tools=self.tools)
+        self._system_prompt_tokens = None
+    
+    async def _plan_scenes(self, user_prompt: str) -> dict:
+        """
+        Outline the story and its scenes in one structured call.
+        
+        Args:
+            user_prompt: The user's story prompt/request
+            
+        Returns:
+            Story plan with overview fields and a "scenes" list of
+            {title, location, time, beat} dicts
+        """
+        response = await self.client.aio.models.generate_content(
+            model=FAST_MODEL_NAME,
+            contents=f"""Plan an original ~{TARGET_RUNTIME_MINUTES} minute short film.
+
+User Request: {user_prompt if user_prompt else "Create an original, compelling story. Surprise me with the genre and concept."}
+
+{"Research Brief:" + chr(10) + self.research if self.research else ""}
+
+Outline the story overview and 4-8 scenes. Each scene beat should state what happens and how it moves the story forward.
+Make sure the plot has no holes - no obvious solutions ignored, no information characters would simply share.""",
+            config=_PLAN_CONFIG,
+        )
+        return json.loads(response.text or "{}")
+    
+    async def _write_scene(self, plan: dict, index: int) -> str:
+        """
+        Write the body of one planned scene.
+        
+        Args:
+            plan: Story plan from _plan_scenes
+            index: 0-based scene index
+            
+        Returns:
+            Scene narrative and dialogue as markdown
+        """
+        scene = plan["scenes"][index]
+        outline = "\n".join(
+            f"{i}. {s['title']} ({s['location']}, {s['time']}): {s['beat']}"
+            for i, s in enumerate(plan["scenes"], 1)
+        )
+        characters = "\n".join(f"- {c}" for c in plan["characters"])
+        
+        response = await self.client.aio.models.generate_content(
+            model=MODEL_NAME,
+            contents=f"""Title: {plan['title']}
+Genre: {plan['genre']}
+Tone: {plan['tone']}
+Logline: {plan['logline']}
+
+Characters:
+{characters}
+
+Scene outline:
+{outline}
+
+Write SCENE {index + 1}: {scene['title']}
+Location: {scene['location']}
+Time: {scene['time']}
+Beat: {scene['beat']}""",
+            config=_SCENE_CONFIG,
+        )
+        return (response.text or "").strip()
+    
+    def _assemble_draft(
+        self,
+        plan: dict,
+        scene_texts: list[str],
+        draft_num: int,
+        total_drafts: int,
+    ) -> str:
+        """Lay out the planned overview and written scenes in the document format."""
+        scenes = plan["scenes"]
+        characters = "\n".join(f"- {c}" for c in plan["characters"])
+        sections = [f"""# {plan['title']}
+
+**Genre:** {plan['genre']}  
+**Tone:** {plan['tone']}  
+**Estimated Runtime:** ~{TARGET_RUNTIME_MINUTES} minutes  
+**Draft:** {draft_num} of {total_drafts}""", f"""## STORY OVERVIEW
+
+### Logline
+{plan['logline']}
+
+### Theme
+{plan['theme']}
+
+### Story Arc
+{plan['story_arc']}
+
+### Characters
+{characters}
+
+### Emotional Journey
+{plan['emotional_journey']}
+
+### Goal
+{plan['goal']}"""]
+        
+        for i, (scene, text) in enumerate(zip(scenes, scene_texts), 1):
+            sections.append(f"""## SCENE {i}: {scene['title']}
+**Location:** {scene['location']}
+**Time:** {scene['time']}
+
+{text}""")
+        
+        per_scene = TARGET_RUNTIME_MINUTES / len(scenes)
+        sections.append(f"""## Production Notes
+- Estimated runtime: ~{TARGET_RUNTIME_MINUTES} minutes across {len(scenes)} scenes (~{per_scene:.1f} min each)""")
+        
+        return "\n\n---\n\n".join(sections)
+    
+    async def _draft_scenes_in_parallel(
+        self,
+        editor,
+        user_prompt: str,
+        draft_num: int,
+        total_drafts: int,
+    ) -> Optional[dict]:
+        """
+        Write the first draft as plan -> concurrent scenes -> one insert.
+        
+        Args:
+            editor: DocumentEditor for the working document
+            user_prompt: The user's story prompt/request
+            draft_num: Current draft number
+            total_drafts: Total number of drafts
+            
+        Returns:
+            Result dict like acall(), or None if the plan is too short or
+            any step failed (nothing has been written in that case)
+        """
+        try:
+            plan = await self._plan_scenes(user_prompt)
+            scenes = plan.get("scenes") or []
+            if len(scenes) < MIN_PARALLEL_SCENES:
+                logger.info("  [%s] Plan has %d scene(s), writing the draft in one pass", self.name, len(scenes))
+                return None
+            
+            logger.info("  [%s] Writing %d planned scenes concurrently...", self.name, len(scenes))
+            semaphore = asyncio.Semaphore(MAX_PARALLEL_SCENES)
+            
+            async def write(index: int) -> str:
+                async with semaphore:
+                    return await self._write_scene(plan, index)
+            
+            scene_texts = await asyncio.gather(*(write(i) for i in range(len(scenes))))
+        except Exception as e:
+            logger.warning("  [%s] Parallel drafting failed (%s), writing the draft in one pass", self.name, e)
+            return None
+        
+        content = self._assemble_draft(plan, scene_texts, draft_num, total_drafts)
+        async with editor.lock:
+            editor.insert_lines(0, content, agent=self.name)
+        
+        summary = f"Wrote first draft of '{plan['title']}' from a {len(scenes)}-scene plan"
+        self._add_to_history("assistant", f"[Completed editing] {summary}")
+        logger.info("  [%s] %s", self.name, summary)
+        
+        return {
+            "success": True,
+            "agent": self.name,
+            "draft_num": draft_num,
+            "iterations": 1,
+            "edit_summary": ["insert_lines", summary],
+            "context_stats": self.get_context_stats(),
+        }
     
-    def create_initial_draft(
+    async def create_initial_draft(
         self,
         editor,
         user_prompt: str,
-        research: str,
         draft_num: int,
         total_drafts: int,
     ) -> dict:
-        """Create the initial draft from scratch."""
+        """Create the initial draft from scratch (see set_research() for the brief)."""
+        if PARALLEL_SCENE_DRAFTING and editor.get_line_count() <= 1:
+            result = await self._draft_scenes_in_parallel(
+                editor, user_prompt, draft_num, total_drafts
+            )
+            if result is not None:
+                return result
+        
         task = f"""Create the FIRST DRAFT of a ~10 minute short film.
 
 User Request: {user_prompt if user_prompt else "Create an original, compelling story. Surprise me with the genre and concept."}
 
-{"Research Brief:" + chr(10) + research if research else ""}
+{"Draw on the RESEARCH BRIEF in your instructions." if self.research else ""}
 
 Draft {draft_num} of {total_drafts}.
 
@@ -120,11 +376,12 @@ Important:
 2. Create 4-8 scenes with clear narrative and dialogue
 3. Leave room for [VISUAL] and [AUDIO] tags (don't add them yourself)
 4. End with Production Notes (runtime estimates)
-5. CHECK FOR PLOT HOLES before finalizing"""
+5. CHECK FOR PLOT HOLES before finalizing
+6. Append each section with its own insert_lines(after_line=-1, ...) call, in document order"""
 
-        return self.call(editor, task, draft_num)
+        return await self.acall(editor, task, draft_num)
     
-    def revise_draft(
+    async def revise_draft(
         self,
         editor,
         feedback: str,
@@ -146,5 +403,5 @@ Instructions:
 5. Update the Draft number in the metadata
 6. CHECK FOR PLOT HOLES - especially any "why don't they just..." issues"""
 
-        return self.call(editor, task, draft_num)
+        return await self.acall(editor, task, draft_num)
 
@@ -13,7 +13,16 @@ load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL_NAME = "gemini-3-pro-preview"
+FAST_MODEL_NAME = "gemini-3-flash-preview"  # Planning calls that only produce structured outlines
 THINKING_LEVEL = "low"  # "low" for speed - agents don't need deep reasoning per call
+THINKING_LEVEL_DISPATCH = "low"  # Research turns that only pick searches (Pro cannot disable thinking; "minimal" on Flash)
+THINKING_LEVEL_SYNTHESIS = "low"  # Research turns that write the brief
+HTTP_MAX_CONNECTIONS = 32  # Shared async connection pool for all agents
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
+GEMINI_RETRY_ATTEMPTS = 5  # Tries per request, including the first; 408/429/5xx and dropped connections are retried
+GEMINI_RETRY_INITIAL_DELAY_SECONDS = 2  # First backoff; doubles with jitter on each retry
+GEMINI_RETRY_MAX_DELAY_SECONDS = 60
+GEMINI_TIMEOUT_SECONDS = 600  # Per request; thinking over a full draft can take minutes
 
 # =============================================================================
 # Context Management
@@ -22,13 +31,42 @@ THINKING_LEVEL = "low"  # "low" for speed - agents don't need deep reasoning per
 MAX_CONTEXT_TOKENS = 1_000_000  # Gemini 3 Pro context window
 TOKEN_OFFLOAD_THRESHOLD = 0.80  # Offload when >80% of context used
 TOKEN_THRESHOLD = int(MAX_CONTEXT_TOKENS * TOKEN_OFFLOAD_THRESHOLD)  # 800,000 tokens
+FULL_DOCUMENT_MAX_LINES = 300  # Longer documents are sent as an outline; agents pull sections with read_lines
+
+# =============================================================================
+# Prompt Caching
+# =============================================================================
+
+PROMPT_CACHE_TTL_SECONDS = 3600  # Lifetime of provider-side cached system prompts
+PROMPT_CACHE_REFRESH_MARGIN_SECONDS = 300  # Recreate caches this long before they expire
+
+# =============================================================================
+# Batch Processing
+# =============================================================================
+
+CHECKER_BATCH_MODE = False  # Route non-final Checker passes through the Batch API (~50% cheaper, much slower)
+AUDIENCE_BATCH_MODE = os.getenv("HOLLYWOODAI_BATCH", "0") == "1"  # Collect all audience feedback in one Batch API job after the last draft (~50% cheaper; revisions run without feedback)
+BATCH_POLL_INTERVAL_SECONDS = 30
+
+# =============================================================================
+# Research
+# =============================================================================
+
+RESEARCH_STRATEGY = "plan"  # "plan" (plan all queries, search in parallel, synthesize once) or "iterative"
+MAX_SEARCH_RESULT_CHARS = 4000  # Longer grounded search summaries are truncated before use
+RESEARCH_MODE = os.getenv("RESEARCH_MODE", "interactive")  # "batch" sends planned searches as one Batch API job (~50% cheaper, takes minutes)
 
 # =============================================================================
 # Draft Configuration
 # =============================================================================
 
 TOTAL_DRAFTS = 5
+MIN_DRAFTS = 2  # Stop after this many once the audience calls a draft ready with no plot holes
+MAX_CONCURRENT_STORIES = 3  # Stories run_batch() drafts at once; the rest wait for a free slot
+CHECKER_SKIP_CLEAN_DRAFTS = True  # Skip the Checker when the previous draft's audience flagged no plot holes or format issues
+CHECKER_SAFETY_INTERVAL = 3  # ...but always run it on every Nth draft, the first and the last
 TARGET_RUNTIME_MINUTES = 10
+PARALLEL_SCENE_DRAFTING = True  # Write first-draft scenes concurrently from a planned outline
 
 # =============================================================================
 # Output Paths
@@ -38,6 +76,20 @@ OUTPUT_DIR = "outputs"
 DRAFTS_DIR = os.path.join(OUTPUT_DIR, "drafts")
 CONTEXT_ARCHIVE_DIR = os.path.join(OUTPUT_DIR, "context_archive")
 FINAL_STORY_PATH = os.path.join(OUTPUT_DIR, "final_story.md")
+DOCUMENT_SNAPSHOT_EVERY = 50  # Working-document edits between full rewrites; edits in between are appended to a write-ahead log
+EDIT_HISTORY_MAX_ENTRIES = 1000  # Edits kept in memory per document; older ones are appended to a .history.jsonl sidecar
+
+# =============================================================================
+# Response Caching
+# =============================================================================
+
+RESPONSE_CACHE_PATH = os.path.join(OUTPUT_DIR, "cache.sqlite")  # Persists across runs
+RESPONSE_CACHE_MEMORY_ENTRIES = 512  # In-process LRU size per cache
+SEARCH_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Grounded search results are reused for a week
+RESEARCH_CACHE_ENABLED = os.getenv("RESEARCH_CACHE_ENABLED", "1") == "1"  # Set to 0 to always research afresh
+RESEARCH_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Whole research results for a repeated story prompt
+FEEDBACK_CACHE_ENABLED = os.getenv("FEEDBACK_CACHE_ENABLED", "1") == "1"  # Set to 0 to always ask the audience afresh
+FEEDBACK_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Audience feedback for an identical draft and previous feedback
 
 # =============================================================================
 # System Prompts
@@ -337,35 +389,15 @@ Examples of plot holes to catch:
 
 ## Output Format:
 
-```markdown
-# Audience Feedback - Draft [N]
-
-## Overall Impression
-[2-3 sentences on gut reaction]
-
-## Plot Hole Check (REQUIRED)
-Ask yourself: "Why don't they just...?"
-- [List ANY logical gaps, even small ones]
-- [If a character forgets something, can another character tell them?]
-- [Are there obvious solutions being ignored?]
-- [Write "None found" ONLY if you genuinely found zero issues after careful analysis]
-
-## What's Working
-- [Specific strength 1]
-- [Specific strength 2]
-- [Specific strength 3]
-
-## Areas for Improvement
-- [Issue 1]: [Specific suggestion]
-- [Issue 2]: [Specific suggestion]
-- [Issue 3]: [Specific suggestion]
-
-## Priority for Next Draft
-[Single most important thing to address - if there's a plot hole, this should be it]
-
-## Engagement Score: [1-10]
-[Note: A story with a major plot hole should not score above 6, regardless of other qualities]
-```
+Respond with a JSON object with these fields, in this order:
+- overall_impression: 2-3 sentences on your gut reaction
+- plot_hole_analysis: Ask yourself "Why don't they just...?" List ANY logical gaps, even small ones. If a character forgets something, can another character tell them? Are there obvious solutions being ignored? Use ["None found"] ONLY if you genuinely found zero issues after careful analysis
+- plot_holes_found: true if plot_hole_analysis lists any plot hole
+- whats_working: 3 specific strengths
+- areas_for_improvement: 3 entries of the form "Issue: Specific suggestion"
+- priority: the single most important thing to address - if there's a plot hole, this should be it
+- engagement_score: 1-10. A story with a major plot hole should not score above 6, regardless of other qualities
+- ready_for_production: true only if the script could be shot as-is
 
 IMPORTANT: You do NOT modify the script. You ONLY provide feedback that the Writer will use in the next draft iteration."""
 
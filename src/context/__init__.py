@@ -1,4 +1,5 @@
 from .manager import ContextManager
+from .prompt_cache import PromptCache
+from .response_cache import ResponseCache
 
-__all__ = ["ContextManager"]
-
+__all__ = ["ContextManager", "PromptCache", "ResponseCache"]
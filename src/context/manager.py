@@ -2,21 +2,242 @@
 Context Manager for tracking token usage and offloading context to files.
 """
 
+import asyncio
+import functools
 import os
+import hashlib
+import itertools
 import json
-from datetime import datetime
+import mmap
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from typing import Optional
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+
+try:
+    from google.genai.local_tokenizer import LocalTokenizer
+except ImportError:  # needs the optional sentencepiece package
+    LocalTokenizer = None
+
+try:
+    import msgpack
+    import zstandard
+except ImportError:  # archives fall back to JSON
+    msgpack = None
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
 
 from ..config import (
     GEMINI_API_KEY,
     MODEL_NAME,
+    FAST_MODEL_NAME,
     TOKEN_THRESHOLD,
     MAX_CONTEXT_TOKENS,
     CONTEXT_ARCHIVE_DIR,
     THINKING_LEVEL,
 )
+from .prompt_cache import PromptCache
+
+
+# Static part of every summarization request, uploaded once as a context cache
+SUMMARY_INSTRUCTIONS = """You are summarizing the work history of an agent in a collaborative movie creation system.
+
+Summarize the conversation history you are given, focusing on:
+1. What drafts were worked on
+2. Key decisions and changes made
+3. Important feedback received
+4. Current state of the story/work
+
+Be concise but preserve critical details that the agent might need to reference."""
+
+
+# Archives are MessagePack streamed through zstd when both packages are
+# installed, otherwise compact JSON
+COMPRESSED_ARCHIVE_EXTENSION = ".mpk.zst"
+ARCHIVE_EXTENSION = COMPRESSED_ARCHIVE_EXTENSION if msgpack is not None else ".txt"
+ARCHIVE_ZSTD_LEVEL = 3
+
+
+def _dump_json(value) -> bytes:
+    """Serialize one value as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_archive(filepath: str, archive_content: dict) -> None:
+    """
+    Write an archive file; runs on the manager's I/O thread.
+    
+    Lists and dicts (the messages and document snapshots) are serialized
+    one item at a time, so the encoded archive is never held in memory
+    whole.
+    """
+    try:
+        if filepath.endswith(COMPRESSED_ARCHIVE_EXTENSION):
+            packer = msgpack.Packer()
+            compressor = zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL)
+            with open(filepath, 'wb') as f, compressor.stream_writer(f) as writer:
+                writer.write(packer.pack_map_header(len(archive_content)))
+                for key, value in archive_content.items():
+                    writer.write(packer.pack(key))
+                    if isinstance(value, list):
+                        writer.write(packer.pack_array_header(len(value)))
+                        for item in value:
+                            writer.write(packer.pack(item))
+                    elif isinstance(value, dict):
+                        writer.write(packer.pack_map_header(len(value)))
+                        for item_key, item in value.items():
+                            writer.write(packer.pack(item_key))
+                            writer.write(packer.pack(item))
+                    else:
+                        writer.write(packer.pack(value))
+        else:
+            with open(filepath, 'wb') as f:
+                f.write(b"{")
+                for i, (key, value) in enumerate(archive_content.items()):
+                    if i:
+                        f.write(b",")
+                    f.write(_dump_json(key) + b":")
+                    if isinstance(value, list):
+                        f.write(b"[")
+                        for j, item in enumerate(value):
+                            if j:
+                                f.write(b",")
+                            f.write(_dump_json(item))
+                        f.write(b"]")
+                    elif isinstance(value, dict):
+                        f.write(b"{")
+                        for j, (item_key, item) in enumerate(value.items()):
+                            if j:
+                                f.write(b",")
+                            f.write(_dump_json(item_key) + b":" + _dump_json(item))
+                        f.write(b"}")
+                    else:
+                        f.write(_dump_json(value))
+                f.write(b"}")
+    except Exception as e:
+        print(f"Warning: Could not write context archive {filepath} ({e})")
+
+
+# Words and individual punctuation marks, scaled up for the words the
+# tokenizer splits into several tokens
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_TOKENS_PER_WORD = 1.35
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate a token count without a tokenizer.
+    
+    Args:
+        text: Text to estimate
+        
+    Returns:
+        Approximate token count
+    """
+    return int(sum(1 for _ in _WORD_RE.finditer(text)) * _TOKENS_PER_WORD)
+
+
+# Token counts are shared by every ContextManager in the process: the same
+# draft text passes through each agent's history
+LOCAL_TOKEN_CACHE_ENTRIES = 4096
+
+# Exact (remote) counts by message hash; kept apart from local counts so a
+# verifying count never reuses a local one
+_remote_token_counts: dict[str, int] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_local_tokenizer():
+    """Load Gemini's tokenizer once per process, or None if unavailable."""
+    if LocalTokenizer is None:
+        return None
+    try:
+        return LocalTokenizer(model_name=MODEL_NAME)
+    except Exception as e:
+        print(f"Warning: Local tokenizer unavailable ({e}), counting tokens remotely")
+        return None
+
+
+@functools.lru_cache(maxsize=LOCAL_TOKEN_CACHE_ENTRIES)
+def _count_local_tokens(text: str) -> int:
+    """Count tokens with the shared local tokenizer, caching recent texts."""
+    return _get_local_tokenizer().count_tokens(text).total_tokens
+
+
+def _render_messages(messages: list[dict]) -> list[str]:
+    """Render history messages as text, for counting and summarizing."""
+    return [
+        f"[{(msg.get('role') or 'user').upper()}]\n{msg.get('content') or ''}"
+        for msg in messages
+    ]
+
+
+class _RenderedHistory:
+    """
+    Rendered text and content hashes of a tracked history's messages.
+    
+    Extended in place as the history grows; the number of rendered lines
+    is the version compared against len(messages).
+    """
+    
+    __slots__ = ("messages", "lines", "keys")
+    
+    def __init__(self, messages: list[dict]):
+        self.messages = messages
+        self.lines: list[str] = []
+        self.keys: list[str] = []
+
+
+@dataclass(slots=True)
+class AgentContextState:
+    """
+    What the manager knows about one agent's current history.
+    
+    Replaced wholesale when the agent starts a new history, so nothing here
+    is ever recomputed for messages already seen.
+    """
+    
+    messages: list[dict]
+    running_tokens: Optional[int] = None
+    rendered: _RenderedHistory = field(init=False)
+    last_summary: Optional[str] = None
+    last_summary_upto: int = 0
+    
+    def __post_init__(self):
+        self.rendered = _RenderedHistory(self.messages)
+
+
+SUMMARY_CONFIG_KWARGS = {
+    "thinking_config": types.ThinkingConfig(thinking_level=THINKING_LEVEL),
+    "max_output_tokens": 2000,
+}
+
+# Long histories are summarized hierarchically: the first and last few
+# messages are kept verbatim and the middle is pre-summarized in windows of
+# roughly 4k tokens, so the final summary's input stays bounded
+SUMMARY_HEAD_MESSAGES = 2
+SUMMARY_TAIL_MESSAGES = 6
+SUMMARY_WINDOW_CHARS = 16_000
+
+WINDOW_SUMMARY_PROMPT = """Summarize this excerpt from an agent's work history in a collaborative movie creation system in at most 200 words.
+Keep draft numbers, decisions, changes made, feedback received and any story details the agent may need later.
+
+EXCERPT:
+"""
+
+_WINDOW_SUMMARY_CONFIG = types.GenerateContentConfig(
+    thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
+    max_output_tokens=1000,
+)
 
 
 class ContextManager:
@@ -37,117 +258,525 @@ class ContextManager:
         """
         self.client = client
         os.makedirs(CONTEXT_ARCHIVE_DIR, exist_ok=True)
+        self._archive_prefix = os.path.join(CONTEXT_ARCHIVE_DIR, "")
+        self._archive_counter = itertools.count()
+        
+        # Per-agent running totals, renderings and last summaries of the
+        # histories grown with append_message
+        self._state: dict[str, AgentContextState] = {}
+        
+        # Sub-summaries of history windows by content hash, reused whenever
+        # the same window is summarized again
+        self._window_summaries: dict[str, str] = {}
+        
+        # Offload results by (agent name, history fingerprint), so offloading
+        # an unchanged history again reuses its archive and summary
+        self._offload_cache: dict[tuple[str, bytes], tuple[str, str, str]] = {}
+        
+        # Archive files are written off the draft loop's critical path
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="archive")
+        self._pending_writes: list[Future] = []
+        
+        # Summarization instructions are identical for every agent and draft
+        self._summary_cache = PromptCache(client, SUMMARY_INSTRUCTIONS)
+        
+        # Gemini's own tokenizer run in-process, when available
+        self._local_tokenizer = _get_local_tokenizer()
+    
+    @property
+    def has_local_tokenizer(self) -> bool:
+        """Whether token counts are computed in-process."""
+        return self._local_tokenizer is not None
+    
+    def _count_text(self, text: str, exact: bool) -> int:
+        """Count tokens remotely if exact, otherwise with the local tokenizer."""
+        if exact:
+            response = self.client.models.count_tokens(
+                model=MODEL_NAME,
+                contents=text,
+            )
+            return response.total_tokens
+        return _count_local_tokens(text)
     
-    def count_tokens(self, messages: list[dict]) -> int:
+    def count_tokens(
+        self,
+        messages: list[dict],
+        doc_snapshots: Optional[dict[int, str]] = None,
+        verify: bool = False,
+        agent_name: Optional[str] = None,
+    ) -> int:
         """
         Count tokens in a list of messages.
         
+        Messages are counted with the local tokenizer when it is available,
+        otherwise remotely; either way each distinct message is counted once
+        and the count is shared with every other ContextManager. Document snapshots referenced by a
+        message's 'doc_ref' are never sent for remote counting: they are
+        counted locally or estimated (see estimate_tokens).
+        
         Args:
             messages: List of message dicts with 'role' and 'content'
+            doc_snapshots: Snapshots referenced by 'doc_ref', keyed by ref
+            verify: Count messages remotely even if a local tokenizer is
+                available (a round trip per uncached message)
+            agent_name: Agent whose tracked history this is, to reuse its
+                rendering
             
         Returns:
             Total token count
         """
-        # Convert messages to text for counting
-        text_content = "\n".join(
-            f"{msg.get('role', 'user')}: {msg.get('content', '')}"
-            for msg in messages
-        )
+        snapshot_tokens = 0
+        for msg in messages:
+            if doc_snapshots and "doc_ref" in msg:
+                snapshot = doc_snapshots.get(msg["doc_ref"], "")
+                if self._local_tokenizer is not None:
+                    snapshot_tokens += self._count_text(snapshot, exact=False)
+                else:
+                    snapshot_tokens += estimate_tokens(snapshot)
         
-        try:
-            response = self.client.models.count_tokens(
-                model=MODEL_NAME,
-                contents=text_content,
-            )
-            return response.total_tokens
-        except Exception as e:
-            # Fallback: rough estimate (4 chars per token)
-            print(f"Warning: Token counting failed ({e}), using estimate")
-            return len(text_content) // 4
+        exact = verify or self._local_tokenizer is None
+        
+        rendered = self._render(messages, agent_name)
+        
+        total = 0
+        counting_failed = False
+        for text, key in zip(rendered.lines, rendered.keys):
+            tokens = _remote_token_counts.get(key) if exact else None
+            
+            if tokens is None and not counting_failed:
+                try:
+                    tokens = self._count_text(text, exact)
+                    if exact:
+                        _remote_token_counts[key] = tokens
+                except Exception as e:
+                    print(f"Warning: Token counting failed ({e}), using estimate")
+                    counting_failed = True
+            
+            if tokens is None:
+                # Fallback: word-based estimate, not cached
+                tokens = estimate_tokens(text)
+            total += tokens
+        
+        return total + snapshot_tokens
+    
+    def _render(self, messages: list[dict], agent_name: Optional[str] = None) -> _RenderedHistory:
+        """
+        Render messages, reusing and extending the stored rendering if they
+        are the agent's tracked history.
+        
+        Args:
+            messages: Conversation history
+            agent_name: Agent the history may belong to
+            
+        Returns:
+            Rendered lines and content hashes, one per message
+        """
+        state = self._state.get(agent_name)
+        if state is not None and state.messages is messages:
+            rendered = state.rendered
+        else:
+            rendered = _RenderedHistory(messages)
+        
+        if len(rendered.lines) < len(messages):
+            new_lines = _render_messages(messages[len(rendered.lines):])
+            rendered.lines.extend(new_lines)
+            rendered.keys.extend([
+                hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+                for text in new_lines
+            ])
+        return rendered
+    
+    def count_text_tokens(self, text: str, verify: bool = False) -> int:
+        """
+        Count tokens in a standalone piece of text (e.g. a system prompt).
+        
+        Args:
+            text: Text to count
+            verify: Count remotely even if a local tokenizer is available
+            
+        Returns:
+            Token count
+        """
+        return self.count_tokens([{"role": "system", "content": text}], verify=verify)
     
-    def should_offload(self, messages: list[dict]) -> bool:
+    def _agent_state(self, agent_name: str, messages: list[dict]) -> AgentContextState:
+        """Get an agent's state, starting afresh if it now has a different history."""
+        state = self._state.get(agent_name)
+        if state is None or state.messages is not messages:
+            state = AgentContextState(messages)
+            self._state[agent_name] = state
+        return state
+    
+    def running_tokens(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> int:
+        """
+        Get the running token total of an agent's history, counting it once
+        if unknown.
+        
+        Args:
+            messages: Conversation history
+            agent_name: Agent the history belongs to
+            doc_snapshots: Snapshots referenced by 'doc_ref', keyed by ref
+            
+        Returns:
+            Total token count
+        """
+        state = self._agent_state(agent_name, messages)
+        if state.running_tokens is None:
+            state.running_tokens = self.count_tokens(messages, doc_snapshots, agent_name=agent_name)
+        return state.running_tokens
+    
+    def set_running_tokens(self, messages: list[dict], agent_name: str, total: int) -> None:
+        """
+        Replace an agent history's running total (e.g. with a verified count).
+        
+        Args:
+            messages: Conversation history
+            agent_name: Agent the history belongs to
+            total: Token count to record
+        """
+        self._agent_state(agent_name, messages).running_tokens = total
+    
+    def append_message(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        msg: dict,
+        doc_snapshots: Optional[dict[int, str]] = None,
+        tokens: Optional[int] = None,
+    ) -> int:
+        """
+        Append a message and add only its tokens to the history's running total.
+        
+        Histories must be grown through this method for the total to stay
+        accurate.
+        
+        Args:
+            messages: Conversation history to append to
+            agent_name: Agent the history belongs to
+            msg: Message dict with 'role' and 'content' (and optional 'doc_ref')
+            doc_snapshots: Snapshots referenced by 'doc_ref', keyed by ref
+            tokens: The message's token count if the caller already has it
+            
+        Returns:
+            New total token count
+        """
+        total = self.running_tokens(messages, agent_name, doc_snapshots)
+        if tokens is None:
+            tokens = self.count_tokens([msg], doc_snapshots)
+        messages.append(msg)
+        total += tokens
+        self._state[agent_name].running_tokens = total
+        return total
+    
+    def release(self, agent_name: str) -> None:
+        """Drop an agent's state when its history is being discarded."""
+        self._state.pop(agent_name, None)
+    
+    def should_offload(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        static_tokens: int = 0,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> bool:
         """
         Check if context should be offloaded based on token count.
         
+        Uses the running total, so this is O(1) for histories grown with
+        append_message.
+        
         Args:
             messages: Current conversation history
+            agent_name: Agent the history belongs to
+            static_tokens: Precomputed tokens sent with every request (system prompt)
+            doc_snapshots: Snapshots referenced by 'doc_ref', keyed by ref
             
         Returns:
             True if token count exceeds threshold
         """
-        token_count = self.count_tokens(messages)
+        token_count = self.running_tokens(messages, agent_name, doc_snapshots) + static_tokens
         return token_count > TOKEN_THRESHOLD
     
-    def generate_summary(self, messages: list[dict], agent_name: str) -> str:
+    def _summary_input(self, messages: list[dict], agent_name: str) -> tuple[list[str], Optional[str]]:
         """
-        Generate a summary of the conversation history.
+        Get the rendered messages a summary has to cover.
+        
+        If the agent's tracked history was summarized before, only the
+        messages added since then are returned, alongside that summary.
+        
+        Returns:
+            Tuple of (rendered messages, previous summary or None)
+        """
+        lines = self._render(messages, agent_name).lines
+        state = self._state.get(agent_name)
+        if state is not None and state.messages is messages and state.last_summary is not None:
+            return lines[state.last_summary_upto:], state.last_summary
+        return lines, None
+    
+    def _remember_summary(self, messages: list[dict], agent_name: str, summary: str) -> None:
+        """Record a summary of the agent's tracked history for incremental reuse."""
+        state = self._state.get(agent_name)
+        if state is not None and state.messages is messages:
+            state.last_summary = summary
+            state.last_summary_upto = len(messages)
+    
+    def _summary_windows(self, lines: list[str]) -> list[str]:
+        """
+        Split the middle of a long history into windows to pre-summarize.
         
         Args:
-            messages: Messages to summarize
-            agent_name: Name of the agent for context
+            lines: Rendered messages to summarize
             
         Returns:
-            Summary string
+            Rendered windows of about SUMMARY_WINDOW_CHARS each, or an
+            empty list if the history is short enough to send verbatim
+        """
+        middle = lines[SUMMARY_HEAD_MESSAGES:len(lines) - SUMMARY_TAIL_MESSAGES]
+        if sum(len(line) for line in middle) <= SUMMARY_WINDOW_CHARS:
+            return []
+        
+        windows = []
+        current = []
+        size = 0
+        for line in middle:
+            if current and size + len(line) > SUMMARY_WINDOW_CHARS:
+                windows.append("\n\n".join(current))
+                current = []
+                size = 0
+            current.append(line)
+            size += len(line)
+        if current:
+            windows.append("\n\n".join(current))
+        return windows
+    
+    def _window_key(self, window: str) -> str:
+        """Content hash of a history window."""
+        return hashlib.blake2b(window.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _summarize_window(self, window: str) -> str:
+        """Summarize one history window, reusing an earlier summary of it."""
+        key = self._window_key(window)
+        summary = self._window_summaries.get(key)
+        if summary is None:
+            response = self.client.models.generate_content(
+                model=FAST_MODEL_NAME,
+                contents=WINDOW_SUMMARY_PROMPT + window,
+                config=_WINDOW_SUMMARY_CONFIG,
+            )
+            summary = response.text or ""
+            self._window_summaries[key] = summary
+        return summary
+    
+    async def _asummarize_window(self, window: str) -> str:
+        """Async variant of _summarize_window() using the async client."""
+        key = self._window_key(window)
+        summary = self._window_summaries.get(key)
+        if summary is None:
+            response = await self.client.aio.models.generate_content(
+                model=FAST_MODEL_NAME,
+                contents=WINDOW_SUMMARY_PROMPT + window,
+                config=_WINDOW_SUMMARY_CONFIG,
+            )
+            summary = response.text or ""
+            self._window_summaries[key] = summary
+        return summary
+    
+    def _summary_prompt(
+        self,
+        lines: list[str],
+        agent_name: str,
+        window_summaries: Optional[list[str]] = None,
+        previous_summary: Optional[str] = None,
+    ) -> str:
+        """
+        Build the dynamic part of a summarization request.
+        
+        Args:
+            lines: Rendered messages to summarize
+            agent_name: Name of the agent for context
+            window_summaries: Sub-summaries replacing the middle of the
+                history (see _summary_windows), if it was split
+            previous_summary: Summary of the messages before these, if any
         """
         # Prepare the conversation for summarization
-        conversation_text = "\n\n".join(
-            f"[{msg.get('role', 'unknown').upper()}]\n{msg.get('content', '')}"
-            for msg in messages
-        )
+        if window_summaries:
+            conversation_text = "\n\n".join([
+                *lines[:SUMMARY_HEAD_MESSAGES],
+                *(f"[EARLIER WORK, SUMMARIZED]\n{s}" for s in window_summaries),
+                *lines[len(lines) - SUMMARY_TAIL_MESSAGES:],
+            ])
+        else:
+            conversation_text = "\n\n".join(lines)
+        if previous_summary is not None:
+            conversation_text = f"[PREVIOUS SUMMARY]\n{previous_summary}\n\n{conversation_text}"
         
-        summary_prompt = f"""You are summarizing the work history of an agent named "{agent_name}" in a collaborative movie creation system.
-
-Summarize the following conversation history, focusing on:
-1. What drafts were worked on
-2. Key decisions and changes made
-3. Important feedback received
-4. Current state of the story/work
-
-Be concise but preserve critical details that the agent might need to reference.
+        # The instructions come from the cache (or are sent inline as the same
+        # system instruction, which keeps the prefix identical across agents
+        # for implicit caching); only the dynamic tail is sent here
+        return f"""AGENT: {agent_name}
 
 CONVERSATION HISTORY:
 {conversation_text}
 
 SUMMARY:"""
-
-        try:
-            response = self.client.models.generate_content(
-                model=MODEL_NAME,
-                contents=summary_prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
-                    max_output_tokens=2000,
-                ),
+    
+    def _report_summary_usage(self, usage, agent_name: str) -> None:
+        """Log how much of a summary prompt was served from cache."""
+        if usage:
+            print(
+                f"  Summary for {agent_name}: {usage.cached_content_token_count or 0}"
+                f"/{usage.prompt_token_count or 0} prompt tokens served from cache"
             )
-            return response.text
+    
+    def _stream_summary(self, summary_prompt: str, config: types.GenerateContentConfig) -> tuple:
+        """
+        Stream a summary, collecting its text as chunks arrive.
+        
+        Returns:
+            Tuple of (summary text, usage metadata of the final chunk)
+        """
+        chunks = []
+        usage = None
+        for chunk in self.client.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=summary_prompt,
+            config=config,
+        ):
+            if chunk.text:
+                chunks.append(chunk.text)
+            usage = chunk.usage_metadata or usage
+        return "".join(chunks), usage
+    
+    async def _astream_summary(self, summary_prompt: str, config: types.GenerateContentConfig) -> tuple:
+        """Async variant of _stream_summary() using the async client."""
+        chunks = []
+        usage = None
+        stream = await self.client.aio.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=summary_prompt,
+            config=config,
+        )
+        async for chunk in stream:
+            if chunk.text:
+                chunks.append(chunk.text)
+            usage = chunk.usage_metadata or usage
+        return "".join(chunks), usage
+    
+    def generate_summary(self, messages: list[dict], agent_name: str) -> str:
+        """
+        Generate a summary of the conversation history.
+        
+        An agent history summarized before is summarized incrementally:
+        the previous summary plus the messages added since.
+        
+        Args:
+            messages: Messages to summarize
+            agent_name: Name of the agent for context
+            
+        Returns:
+            Summary string
+        """
+        lines, previous_summary = self._summary_input(messages, agent_name)
+        if previous_summary is not None and not lines:
+            return previous_summary
+        
+        try:
+            window_summaries = [
+                self._summarize_window(window) for window in self._summary_windows(lines)
+            ]
+            summary_prompt = self._summary_prompt(lines, agent_name, window_summaries, previous_summary)
+            
+            config = self._summary_cache.config(**SUMMARY_CONFIG_KWARGS)
+            try:
+                summary, usage = self._stream_summary(summary_prompt, config)
+            except errors.ClientError as e:
+                if e.code != 404 or not config.cached_content:
+                    raise
+                # The provider dropped the cache early; recreate it and retry once
+                self._summary_cache.invalidate()
+                summary, usage = self._stream_summary(
+                    summary_prompt,
+                    self._summary_cache.config(**SUMMARY_CONFIG_KWARGS),
+                )
+            
+            self._report_summary_usage(usage, agent_name)
+            self._remember_summary(messages, agent_name, summary)
+            return summary
         except Exception as e:
             # Fallback: simple extraction of key points
             print(f"Warning: Summary generation failed ({e}), using fallback")
             return f"[Auto-summary failed. Agent: {agent_name}. Messages archived: {len(messages)}]"
     
-    def offload_context(
+    async def agenerate_summary(self, messages: list[dict], agent_name: str) -> str:
+        """
+        Async variant of generate_summary() using the async client, so
+        several agents' summaries can be generated concurrently.
+        
+        Args:
+            messages: Messages to summarize
+            agent_name: Name of the agent for context
+            
+        Returns:
+            Summary string
+        """
+        lines, previous_summary = self._summary_input(messages, agent_name)
+        if previous_summary is not None and not lines:
+            return previous_summary
+        
+        try:
+            window_summaries = await asyncio.gather(*(
+                self._asummarize_window(window) for window in self._summary_windows(lines)
+            ))
+            summary_prompt = self._summary_prompt(lines, agent_name, window_summaries, previous_summary)
+            
+            config = await self._summary_cache.aconfig(**SUMMARY_CONFIG_KWARGS)
+            try:
+                summary, usage = await self._astream_summary(summary_prompt, config)
+            except errors.ClientError as e:
+                if e.code != 404 or not config.cached_content:
+                    raise
+                # The provider dropped the cache early; recreate it and retry once
+                self._summary_cache.invalidate()
+                summary, usage = await self._astream_summary(
+                    summary_prompt,
+                    await self._summary_cache.aconfig(**SUMMARY_CONFIG_KWARGS),
+                )
+            
+            self._report_summary_usage(usage, agent_name)
+            self._remember_summary(messages, agent_name, summary)
+            return summary
+        except Exception as e:
+            # Fallback: simple extraction of key points
+            print(f"Warning: Summary generation failed ({e}), using fallback")
+            return f"[Auto-summary failed. Agent: {agent_name}. Messages archived: {len(messages)}]"
+    
+    def _prepare_archive(
         self,
         messages: list[dict],
         agent_name: str,
         draft_num: int,
-    ) -> tuple[str, str, str]:
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> tuple[str, dict]:
         """
-        Archive old context to a file and return a memory reminder.
+        Build everything in an archive except the summary.
+        
+        Independent of the summary, so it runs while the summary is generated.
         
-        Args:
-            messages: Full conversation history
-            agent_name: Name of the agent
-            draft_num: Current draft number
-            
         Returns:
-            Tuple of (archive_filepath, summary, memory_reminder)
+            Tuple of (archive_filepath, archive_content with "summary" unset)
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{agent_name}_draft{draft_num:02d}_{timestamp}.txt"
-        filepath = os.path.join(CONTEXT_ARCHIVE_DIR, filename)
-        
-        # Generate summary before archiving
-        summary = self.generate_summary(messages, agent_name)
+        # Nanosecond timestamp plus a counter keeps names unique even for
+        # offloads in the same clock tick
+        timestamp = time.time_ns()
+        filepath = (
+            f"{self._archive_prefix}{agent_name}_draft{draft_num:02d}"
+            f"_{timestamp}_{next(self._archive_counter)}{ARCHIVE_EXTENSION}"
+        )
         
         # Archive the full conversation
         archive_content = {
@@ -155,12 +784,32 @@ SUMMARY:"""
             "draft_num": draft_num,
             "timestamp": timestamp,
             "message_count": len(messages),
-            "summary": summary,
+            "summary": None,
             "messages": messages,
+            "doc_snapshots": {
+                str(ref): snapshot for ref, snapshot in (doc_snapshots or {}).items()
+            },
         }
+        return filepath, archive_content
+    
+    def _finish_archive(
+        self,
+        filepath: str,
+        archive_content: dict,
+        summary: str,
+    ) -> tuple[str, str, str]:
+        """
+        Add the summary, queue the archive write and build the memory reminder.
+        
+        Returns:
+            Tuple of (archive_filepath, summary, memory_reminder)
+        """
+        archive_content["summary"] = summary
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(archive_content, f, indent=2, ensure_ascii=False)
+        # The caller replaces (never mutates) an offloaded history, so the
+        # write can proceed in the background
+        self._pending_writes = [f for f in self._pending_writes if not f.done()]
+        self._pending_writes.append(self._io_pool.submit(_write_archive, filepath, archive_content))
         
         # Create memory reminder for new context
         memory_reminder = f"""[MEMORY REMINDER]
@@ -174,10 +823,93 @@ the full history is available in the archived file above.
 ---
 """
         
-        print(f"  Context offloaded for {agent_name}: {len(messages)} messages archived")
+        print(f"  Context offloaded for {archive_content['agent_name']}: {archive_content['message_count']} messages archived")
         
         return filepath, summary, memory_reminder
     
+    def _offload_fingerprint(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> bytes:
+        """Hash of a history's message hashes and its document snapshots."""
+        digest = hashlib.blake2b(digest_size=16)
+        for key in self._render(messages, agent_name).keys:
+            digest.update(key.encode("ascii"))
+        for ref, snapshot in sorted((doc_snapshots or {}).items()):
+            digest.update(f"\0{ref}\0".encode("ascii"))
+            digest.update(snapshot.encode("utf-8"))
+        return digest.digest()
+    
+    def offload_context(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        draft_num: int,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> tuple[str, str, str]:
+        """
+        Archive old context to a file and return a memory reminder.
+        
+        The archive is prepared on the I/O thread while the summary is
+        generated; only the reminder has to wait for both.
+        
+        Args:
+            messages: Full conversation history
+            agent_name: Name of the agent
+            draft_num: Current draft number
+            doc_snapshots: Snapshots referenced by 'doc_ref', archived alongside
+            
+        Returns:
+            Tuple of (archive_filepath, summary, memory_reminder)
+        """
+        cache_key = (agent_name, self._offload_fingerprint(messages, agent_name, doc_snapshots))
+        cached = self._offload_cache.get(cache_key)
+        if cached is not None:
+            print(f"  Context unchanged for {agent_name}, reusing archive {cached[0]}")
+            return cached
+        
+        prepared = self._io_pool.submit(
+            self._prepare_archive, messages, agent_name, draft_num, doc_snapshots
+        )
+        summary = self.generate_summary(messages, agent_name)
+        filepath, archive_content = prepared.result()
+        result = self._finish_archive(filepath, archive_content, summary)
+        self._offload_cache[cache_key] = result
+        return result
+    
+    async def aoffload_context(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        draft_num: int,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> tuple[str, str, str]:
+        """Async variant of offload_context() using agenerate_summary()."""
+        cache_key = (agent_name, self._offload_fingerprint(messages, agent_name, doc_snapshots))
+        cached = self._offload_cache.get(cache_key)
+        if cached is not None:
+            print(f"  Context unchanged for {agent_name}, reusing archive {cached[0]}")
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        (filepath, archive_content), summary = await asyncio.gather(
+            loop.run_in_executor(
+                self._io_pool,
+                self._prepare_archive, messages, agent_name, draft_num, doc_snapshots,
+            ),
+            self.agenerate_summary(messages, agent_name),
+        )
+        result = self._finish_archive(filepath, archive_content, summary)
+        self._offload_cache[cache_key] = result
+        return result
+    
+    def flush(self) -> None:
+        """Wait for all pending archive writes to finish."""
+        wait(self._pending_writes)
+        self._pending_writes = []
+    
     def load_archived_context(self, filepath: str) -> Optional[dict]:
         """
         Load archived context from a file.
@@ -188,24 +920,60 @@ the full history is available in the archived file above.
         Returns:
             Archived context dict or None if not found
         """
+        self.flush()
         try:
+            if filepath.endswith(COMPRESSED_ARCHIVE_EXTENSION):
+                if msgpack is None:
+                    raise RuntimeError("msgpack and zstandard are required to read this archive")
+                with open(filepath, 'rb') as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                    return msgpack.unpack(reader)
+            if orjson is not None:
+                # Parse straight from the mapped file instead of a copy of it
+                with open(filepath, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                        memoryview(mm) as view:
+                    return orjson.loads(view)
             with open(filepath, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"Warning: Could not load archived context ({e})")
             return None
     
-    def get_context_stats(self, messages: list[dict]) -> dict:
+    def get_context_stats(
+        self,
+        messages: list[dict],
+        agent_name: str,
+        static_tokens: int = 0,
+        doc_snapshots: Optional[dict[int, str]] = None,
+    ) -> dict:
         """
         Get statistics about current context usage.
         
+        Uses the running total, so this is O(1) for histories grown with
+        append_message.
+        
         Args:
             messages: Current conversation history
+            agent_name: Agent the history belongs to
+            static_tokens: Precomputed tokens sent with every request (system prompt)
+            doc_snapshots: Snapshots referenced by 'doc_ref', keyed by ref
+            
+        Returns:
+            Dict with token count, percentage used, and threshold info
+        """
+        token_count = self.running_tokens(messages, agent_name, doc_snapshots) + static_tokens
+        return self.get_stats_for_count(token_count)
+    
+    def get_stats_for_count(self, token_count: int) -> dict:
+        """
+        Get context usage statistics for an already known token count.
+        
+        Args:
+            token_count: Total tokens in the agent's context
             
         Returns:
             Dict with token count, percentage used, and threshold info
         """
-        token_count = self.count_tokens(messages)
         percentage = (token_count / MAX_CONTEXT_TOKENS) * 100
         
         return {
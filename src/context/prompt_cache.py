@@ -0,0 +1,154 @@
+"""
+Prompt Cache - Gemini context caching for static prompt prefixes.
+"""
+
+import time
+from typing import Optional
+from google import genai
+from google.genai import types
+
+from ..config import MODEL_NAME, PROMPT_CACHE_TTL_SECONDS, PROMPT_CACHE_REFRESH_MARGIN_SECONDS
+
+
+class PromptCache:
+    """
+    Uploads a static system prompt (and tool schema) once as a Gemini
+    CachedContent and hands out its name for later requests.
+
+    The cache is created lazily on first use and recreated shortly before
+    its TTL runs out. If the provider refuses to cache the prefix (e.g. it
+    is below the model's minimum cacheable size), requests fall back to
+    sending the system instruction and tools inline.
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        system_instruction: str,
+        tools: Optional[list[types.Tool]] = None,
+        ttl_seconds: int = PROMPT_CACHE_TTL_SECONDS,
+    ):
+        """
+        Initialize the prompt cache.
+
+        Args:
+            client: Shared Gemini client instance
+            system_instruction: Static system prompt to cache
+            tools: Optional tool declarations to cache alongside the prompt
+            ttl_seconds: Lifetime of the provider-side cache
+        """
+        self.client = client
+        # Wrapped once here; a plain string would be converted to a Content
+        # on every inline request
+        self.system_instruction = types.Content(parts=[types.Part(text=system_instruction)])
+        self.tools = tools
+        self.ttl_seconds = ttl_seconds
+
+        self._name: Optional[str] = None
+        self._expires_at: float = 0.0
+        self._disabled = False
+
+    def _create_config(self) -> types.CreateCachedContentConfig:
+        """Build the CachedContent creation config."""
+        return types.CreateCachedContentConfig(
+            system_instruction=self.system_instruction,
+            tools=self.tools,
+            ttl=f"{self.ttl_seconds}s",
+        )
+
+    def _is_fresh(self) -> bool:
+        """Check whether the current cache is still safely within its TTL."""
+        return self._name is not None and time.monotonic() < self._expires_at
+
+    def _store(self, cache: types.CachedContent) -> str:
+        """Record a newly created cache and its local expiry time."""
+        self._name = cache.name
+        self._expires_at = (
+            time.monotonic() + self.ttl_seconds - PROMPT_CACHE_REFRESH_MARGIN_SECONDS
+        )
+        return self._name
+
+    def _disable(self, error: Exception) -> None:
+        """Stop trying to cache after the provider rejects the prefix."""
+        print(f"Warning: Prompt caching unavailable ({error}), sending prompt inline")
+        self._disabled = True
+        self._name = None
+
+    def get_name(self) -> Optional[str]:
+        """
+        Get the cache name, creating or refreshing the cache if needed.
+
+        Returns:
+            CachedContent name, or None if caching is unavailable
+        """
+        if self._disabled:
+            return None
+        if self._is_fresh():
+            return self._name
+
+        try:
+            cache = self.client.caches.create(model=MODEL_NAME, config=self._create_config())
+        except Exception as e:
+            self._disable(e)
+            return None
+        return self._store(cache)
+
+    async def aget_name(self) -> Optional[str]:
+        """Async variant of get_name() using the async client."""
+        if self._disabled:
+            return None
+        if self._is_fresh():
+            return self._name
+
+        try:
+            cache = await self.client.aio.caches.create(
+                model=MODEL_NAME, config=self._create_config()
+            )
+        except Exception as e:
+            self._disable(e)
+            return None
+        return self._store(cache)
+
+    def invalidate(self) -> None:
+        """Forget the current cache so the next request recreates it."""
+        self._name = None
+        self._expires_at = 0.0
+
+    async def adelete(self) -> None:
+        """Delete the provider-side cache, if any, instead of leaving it billed until its TTL."""
+        name = self._name
+        self.invalidate()
+        if name is None:
+            return
+        try:
+            await self.client.aio.caches.delete(name=name)
+        except Exception as e:
+            # Already expired or deleted; either way it is gone
+            print(f"Warning: Could not delete prompt cache {name} ({e})")
+
+    def build_config(self, cache_name: Optional[str], **kwargs) -> types.GenerateContentConfig:
+        """
+        Build a GenerateContentConfig that references the cache when available.
+
+        Args:
+            cache_name: Name returned by get_name()/aget_name(), or None
+            **kwargs: Additional per-request config fields (e.g. thinking_config)
+
+        Returns:
+            GenerateContentConfig with either cached_content or inline prompt/tools
+        """
+        if cache_name:
+            return types.GenerateContentConfig(cached_content=cache_name, **kwargs)
+        return types.GenerateContentConfig(
+            system_instruction=self.system_instruction,
+            tools=self.tools,
+            **kwargs,
+        )
+
+    def config(self, **kwargs) -> types.GenerateContentConfig:
+        """Build a request config, creating the cache synchronously if needed."""
+        return self.build_config(self.get_name(), **kwargs)
+
+    async def aconfig(self, **kwargs) -> types.GenerateContentConfig:
+        """Build a request config, creating the cache asynchronously if needed."""
+        return self.build_config(await self.aget_name(), **kwargs)
@@ -0,0 +1,132 @@
+"""
+Response Cache - Two-tier (memory + SQLite) cache for expensive model responses.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..config import RESPONSE_CACHE_PATH, RESPONSE_CACHE_MEMORY_ENTRIES
+
+
+def normalize_key(text: str) -> str:
+    """
+    Normalize free text for exact-match lookup.
+
+    Lowercases, drops punctuation and collapses whitespace so trivially
+    reworded queries ("Lighthouse keepers, 1900s?") share one entry.
+
+    Args:
+        text: Raw query or prompt
+
+    Returns:
+        Hex digest of the normalized text
+    """
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Caches string responses by key in an in-process LRU backed by a SQLite
+    table, so hits survive across runs.
+
+    Entries older than the TTL are treated as misses. Safe to use from
+    multiple threads. If the database cannot be opened, the cache keeps
+    working in memory only.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        ttl_seconds: float,
+        path: str = RESPONSE_CACHE_PATH,
+        max_memory_entries: int = RESPONSE_CACHE_MEMORY_ENTRIES,
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            table: SQLite table holding this cache's entries
+            ttl_seconds: Maximum age of a usable entry
+            path: SQLite database file
+            max_memory_entries: Size of the in-process LRU
+        """
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.stats = {"hits": 0, "misses": 0}
+
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, result TEXT, ts REAL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Response cache database unavailable ({e}), caching in memory only")
+            self._db = None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key (see normalize_key)
+
+        Returns:
+            Cached response, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    f"SELECT result, ts FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                self.stats["misses"] += 1
+                return None
+
+            self._remember(key, entry)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, result: str) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Cache key (see normalize_key)
+            result: Response to cache
+        """
+        entry = (result, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, result, ts) VALUES (?, ?, ?)",
+                    (key, entry[0], entry[1]),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple[str, float]) -> None:
+        """Insert or refresh an entry in the LRU, evicting the oldest if full."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
@@ -2,10 +2,123 @@
 Document Editor - Provides line-based editing operations on the working draft.
 """
 
+import asyncio
+import bisect
+import difflib
+from collections import Counter, deque
+import functools
+import hashlib
+import json
+import mmap
 import os
 import re
-from typing import Optional
-from datetime import datetime
+import time
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
+from ..config import DOCUMENT_SNAPSHOT_EVERY, EDIT_HISTORY_MAX_ENTRIES
+
+
+def _json_line(obj) -> str:
+    """Serialize a write-ahead log or history record as one line of JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8') + '\n'
+    return json.dumps(obj, ensure_ascii=False) + '\n'
+
+
+def _parse_json_line(line: str):
+    """Parse a line written by _json_line()."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _snapshot_digest(content: str) -> str:
+    """Identify a saved snapshot's content in its write-ahead log header."""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# A line that ends a section: the next "## " header or a "---" separator
+_SECTION_END_RE = re.compile(r"^(?:## |---)", re.MULTILINE)
+
+# Section headers, matched over the whole joined document
+_SECTION_RE = re.compile(r"^## .*$", re.MULTILINE)
+
+_NEWLINE_RE = re.compile(r"\n")
+
+# Characters that make a search pattern more than a plain string (a newline
+# never matches within one line either way)
+_REGEX_META_RE = re.compile(r"[.^$*+?{}\[\]\\|()\n]")
+
+
+# Script elements counted as the document is edited
+COUNTED_MARKERS = {
+    "scenes": "## SCENE",
+    "visuals": "[VISUAL]",
+    "audio": "[AUDIO]",
+}
+
+
+# All markers in one alternation, so counting them is a single scan (no
+# marker contains another, so this matches what str.count() would find)
+_MARKER_RE = re.compile("|".join(map(re.escape, COUNTED_MARKERS.values())))
+
+
+def _count_markers(lines: list[str]) -> dict[str, int]:
+    """Count each of COUNTED_MARKERS in some lines (markers never span lines)."""
+    found = Counter(_MARKER_RE.findall('\n'.join(lines)))
+    return {name: found[marker] for name, marker in COUNTED_MARKERS.items()}
+
+
+# Operation-specific fields of each kind of edit-history entry, in order
+_EDIT_FIELDS = {
+    "insert": ("after_line", "lines_added"),
+    "delete": ("start_line", "end_line", "lines_deleted"),
+    "replace": ("start_line", "end_line", "old_line_count", "new_line_count"),
+    "set_content": ("line_count",),
+    "merge": ("old_line_count", "new_line_count"),
+}
+
+# Methods apply_edits() can run, each taking its own arguments plus agent
+EDIT_OPERATIONS = frozenset({"insert_lines", "delete_lines", "replace_lines", "insert_after_pattern"})
+
+
+def _coalesce_splices(splices: list[tuple[int, int, list[str]]]) -> list[tuple[int, int, list[str]]]:
+    """
+    Merge consecutive splices where the later one starts inside (or right
+    after) the lines the earlier one wrote, e.g. a delete then an insert at
+    the same place. Applying the result in order gives the same lines.
+    
+    Args:
+        splices: (start, end, new_lines) edits in the order they were applied
+        
+    Returns:
+        Equivalent, possibly shorter list of splices
+    """
+    merged: list[tuple[int, int, list[str]]] = []
+    for start, end, new_lines in splices:
+        if merged:
+            prev_start, prev_end, prev_lines = merged[-1]
+            prev_written_end = prev_start + len(prev_lines)
+            if prev_start <= start <= prev_written_end and end >= start:
+                head = prev_lines[:start - prev_start]
+                if end <= prev_written_end:
+                    merged[-1] = (prev_start, prev_end, head + new_lines + prev_lines[end - prev_start:])
+                else:
+                    merged[-1] = (prev_start, prev_end + end - prev_written_end, head + new_lines)
+                continue
+        merged.append((start, end, new_lines))
+    return merged
+
+
+@functools.lru_cache(maxsize=128)
+def _compile(pattern: str, flags: int) -> re.Pattern:
+    """Compile a regex, reusing it when agents search for the same pattern again."""
+    return re.compile(pattern, flags)
 
 
 class DocumentEditor:
@@ -16,19 +129,68 @@ class DocumentEditor:
     the entire document each time.
     """
     
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: Optional[str]):
         """
         Initialize the document editor.
         
         Args:
-            filepath: Path to the working document
+            filepath: Path to the working document, or None for an in-memory document
         """
         self.filepath = filepath
         self.lines: list[str] = []
-        self.edit_history: list[dict] = []
+        # Recent edits, one column per field rather than a dict per edit.
+        # Older ones are moved to a sidecar file next to the document (or
+        # dropped for in-memory documents).
+        self._hist_op: deque[str] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._hist_agent: deque[str] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._hist_version: deque[int] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._hist_range: deque[tuple[int, int]] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._hist_ts: deque[int] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._hist_meta: deque[tuple] = deque(maxlen=EDIT_HISTORY_MAX_ENTRIES)
+        self._history_path = f"{filepath}.history.jsonl" if filepath is not None else None
+        
+        # '\n'.join(self.lines), kept until the next mutation
+        self._joined_cache: Optional[str] = None
+        
+        # Newline offsets in the joined content they were computed from
+        self._line_index: Optional[tuple[str, list[int]]] = None
+        
+        # Lowercased joined content for plain-string searches, or None where
+        # lowercasing changes its length (offsets would no longer line up)
+        self._lowered: Optional[tuple[str, Optional[str]]] = None
+        
+        # find_section/find_all_sections results for the joined content they
+        # were computed from, keyed by pattern (None for the full section list)
+        self._section_cache: Optional[tuple[str, dict[Optional[str], Any]]] = None
+        
+        # Running COUNTED_MARKERS totals, updated from the changed lines only
+        self._counts = _count_markers(self.lines)
+        
+        # Monotonic counter bumped on every edit, so agents can ask what changed
+        self.version = 0
+        
+        # Serializes mutations from agents editing concurrently; reads stay lock-free
+        self.lock = asyncio.Lock()
+        
+        # Line edits are appended to a write-ahead log next to the document
+        # and folded into a full rewrite every DOCUMENT_SNAPSHOT_EVERY edits
+        self._wal_path = f"{filepath}.wal" if filepath is not None else None
+        self._edits_since_snapshot = 0
+        
+        # Splices held back while apply_edits() runs, to be logged together
+        self._pending_splices: Optional[list[tuple[int, int, list[str]]]] = None
+        
+        # hash() of the content last written to (or read from) the file
+        self._last_saved_hash: Optional[int] = None
+        
+        # Digest of that content; each write-ahead log opens with the digest
+        # of the snapshot it applies to
+        self._snapshot_digest: Optional[str] = None
         
         # Load existing document or create empty
-        if os.path.exists(filepath):
+        if filepath is None:
+            pass
+        elif os.path.exists(filepath):
             self.load()
         else:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
@@ -36,19 +198,232 @@ class DocumentEditor:
             self.save()
     
     def load(self) -> None:
-        """Load the document from disk."""
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            self.lines = content.split('\n')
+        """Load the document from disk, replaying any logged edits."""
+        with open(self.filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                content = ""
+            else:
+                # Decode straight from the mapped file rather than a copy of it
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    content = str(mm, 'utf-8')
+        if '\r' in content:
+            # Same newline handling as a text-mode read
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        self.lines = content.split('\n')
+        self._joined_cache = content
+        self._last_saved_hash = hash(content)
+        self._snapshot_digest = _snapshot_digest(content)
+        
+        if os.path.exists(self._wal_path):
+            with open(self._wal_path, 'r', encoding='utf-8') as f:
+                for i, entry in enumerate(f):
+                    try:
+                        op = _parse_json_line(entry)
+                    except ValueError:
+                        # Torn final write; everything before it is intact
+                        break
+                    if i == 0:
+                        if op.get("base") != self._snapshot_digest:
+                            # A crash between writing a snapshot and removing
+                            # the log: the snapshot already holds these edits
+                            break
+                        continue
+                    self.lines[op["start"]:op["end"]] = op["lines"]
+                    self._joined_cache = None
+            self.save()
+        
+        self._counts = _count_markers(self.lines)
     
     def save(self) -> None:
-        """Save the document to disk."""
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(self.lines))
+        """
+        Save the full document to disk and discard the write-ahead log.
+        
+        The file is replaced atomically, and not rewritten at all if its
+        content has not changed since the last save.
+        """
+        if self.filepath is None:
+            return
+        content = self.get_content()
+        content_hash = hash(content)
+        if content_hash != self._last_saved_hash:
+            tmp_path = f"{self.filepath}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, self.filepath)
+            self._last_saved_hash = content_hash
+            self._snapshot_digest = _snapshot_digest(content)
+        if self._edits_since_snapshot or os.path.exists(self._wal_path):
+            os.remove(self._wal_path)
+        self._edits_since_snapshot = 0
+    
+    def _log_splice(self, start: int, end: int, new_lines: list[str]) -> None:
+        """
+        Persist a line edit as lines[start:end] = new_lines.
+        
+        Appends one record to the write-ahead log instead of rewriting the
+        document, until DOCUMENT_SNAPSHOT_EVERY edits have accumulated.
+        Inside apply_edits() the record is held back and written with the
+        rest of the batch.
+        
+        Args:
+            start: First replaced line index (0-indexed)
+            end: End of the replaced range (exclusive)
+            new_lines: Lines now in that range
+        """
+        if self.filepath is None:
+            return
+        if self._pending_splices is not None:
+            self._pending_splices.append((start, end, new_lines))
+            return
+        self._write_splices([(start, end, new_lines)])
+    
+    def _write_splices(self, splices: list[tuple[int, int, list[str]]]) -> None:
+        """Append splice records to the write-ahead log with a single fsync, or save if due."""
+        if not splices:
+            return
+        if self._edits_since_snapshot + len(splices) >= DOCUMENT_SNAPSHOT_EVERY:
+            self.save()
+            return
+        records = ''.join(
+            _json_line({"start": start, "end": end, "lines": new_lines})
+            for start, end, new_lines in splices
+        )
+        if not self._edits_since_snapshot:
+            # A new log: tie it to the snapshot it applies to
+            records = _json_line({"base": self._snapshot_digest}) + records
+        with open(self._wal_path, 'a', encoding='utf-8') as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        self._edits_since_snapshot += len(splices)
+    
+    def _record_edit(
+        self,
+        operation: str,
+        agent: str,
+        changed_start: int,
+        changed_end: int,
+        *meta,
+    ) -> None:
+        """
+        Append an edit at the current version to the history, moving the
+        oldest one to disk if full.
+        
+        Args:
+            operation: Kind of edit (a key of _EDIT_FIELDS)
+            agent: Name of agent making the edit
+            changed_start: First line of the touched range (1-indexed)
+            changed_end: Last line of the touched range (inclusive)
+            *meta: Values of the operation's _EDIT_FIELDS, in order
+        """
+        if len(self._hist_op) == self._hist_op.maxlen and self._history_path is not None:
+            with open(self._history_path, 'a', encoding='utf-8') as f:
+                f.write(_json_line(self._edit_entry(0)))
+        self._hist_op.append(operation)
+        self._hist_agent.append(agent)
+        self._hist_version.append(self.version)
+        self._hist_range.append((changed_start, changed_end))
+        self._hist_ts.append(time.time_ns())
+        self._hist_meta.append(meta)
+    
+    def _edit_entry(self, i: int) -> dict:
+        """Materialize the i-th retained edit as a dict."""
+        operation = self._hist_op[i]
+        changed_start, changed_end = self._hist_range[i]
+        return {
+            "operation": operation,
+            "agent": self._hist_agent[i],
+            "version": self._hist_version[i],
+            **dict(zip(_EDIT_FIELDS[operation], self._hist_meta[i])),
+            "changed_start": changed_start,
+            "changed_end": changed_end,
+            "timestamp": self._hist_ts[i],
+        }
     
     def get_content(self) -> str:
         """Get the full document content."""
-        return '\n'.join(self.lines)
+        if self._joined_cache is None:
+            self._joined_cache = '\n'.join(self.lines)
+        return self._joined_cache
+    
+    def _newline_offsets(self) -> list[int]:
+        """
+        Get the character offsets of every newline in the joined content.
+        
+        Rebuilt only when the content has changed since the last call.
+        bisect_left(offsets, pos) + 1 is the 1-indexed line holding pos.
+        """
+        text = self.get_content()
+        if self._line_index is None or self._line_index[0] is not text:
+            self._line_index = (text, [m.start() for m in _NEWLINE_RE.finditer(text)])
+        return self._line_index[1]
+    
+    def _section_lookups(self) -> dict[Optional[str], Any]:
+        """
+        Get the section lookup cache for the current content.
+        
+        Emptied whenever the content has changed since the last lookup, so
+        repeated find_section calls between edits scan the document once.
+        """
+        text = self.get_content()
+        if self._section_cache is None or self._section_cache[0] is not text:
+            self._section_cache = (text, {})
+        return self._section_cache[1]
+    
+    def _find_line(self, pattern: str) -> Optional[int]:
+        """
+        Find the first line containing a match for a pattern.
+        
+        Searches the joined document in one pass, with ^ and $ anchored at
+        line boundaries, instead of searching each line in turn. Patterns
+        without regex syntax (most section names and narrative lines) are
+        found with a plain case-insensitive substring search.
+        
+        Args:
+            pattern: Regex pattern (matched case-insensitively)
+            
+        Returns:
+            0-indexed line number, or None if no line matches
+        """
+        text = self.get_content()
+        offsets = self._newline_offsets()
+        
+        if not _REGEX_META_RE.search(pattern):
+            if self._lowered is None or self._lowered[0] is not text:
+                lowered = text.lower()
+                self._lowered = (text, lowered if len(lowered) == len(text) else None)
+            if self._lowered[1] is not None:
+                pos = self._lowered[1].find(pattern.lower())
+                return bisect.bisect_left(offsets, pos) if pos >= 0 else None
+        
+        regex = _compile(pattern, re.IGNORECASE | re.MULTILINE)
+        
+        pos = 0
+        while (match := regex.search(text, pos)) is not None:
+            line = bisect.bisect_left(offsets, match.start())
+            if line == len(offsets) or match.end() <= offsets[line]:
+                return line
+            # The match runs into the next line; only a match within the
+            # line counts, as if the line had been searched on its own
+            if regex.search(self.lines[line]):
+                return line
+            pos = offsets[line] + 1
+        return None
+    
+    def _update_counts(self, removed: list[str], added: list[str]) -> None:
+        """Adjust the marker counts for lines replaced by an edit."""
+        removed_counts = _count_markers(removed)
+        for name, count in _count_markers(added).items():
+            self._counts[name] += count - removed_counts[name]
+    
+    def get_counts(self) -> dict[str, int]:
+        """
+        Get the number of scenes, [VISUAL] tags and [AUDIO] tags.
+        
+        Returns:
+            Dict keyed by the names in COUNTED_MARKERS
+        """
+        return dict(self._counts)
     
     def get_line_count(self) -> int:
         """Get total number of lines."""
@@ -65,14 +440,16 @@ class DocumentEditor:
         Returns:
             Content of the specified lines with line numbers
         """
-        start_idx = max(0, start - 1)
-        end_idx = min(len(self.lines), end)
-        
-        result = []
-        for i in range(start_idx, end_idx):
-            result.append(f"{i + 1:4d}| {self.lines[i]}")
+        line_count = len(self.lines)
+        start_idx = start - 1 if start > 0 else 0
+        # Clamped into [start_idx, line_count]: a negative end would otherwise
+        # count from the back of the slice
+        end_idx = end if start_idx <= end < line_count else (line_count if end >= line_count else start_idx)
         
-        return '\n'.join(result)
+        return '\n'.join(map(
+            '%4d| %s'.__mod__,
+            enumerate(self.lines[start_idx:end_idx], start=start_idx + 1),
+        ))
     
     def read_document_with_numbers(self) -> str:
         """Read full document with line numbers."""
@@ -99,19 +476,17 @@ class DocumentEditor:
             insert_idx = max(0, after_line)
         
         # Insert the lines
-        for i, line in enumerate(new_lines):
-            self.lines.insert(insert_idx + i, line)
+        self.lines[insert_idx:insert_idx] = new_lines
+        self._joined_cache = None
+        self._update_counts([], new_lines)
+        self._log_splice(insert_idx, insert_idx, new_lines)
         
         # Log the edit
-        edit = {
-            "operation": "insert",
-            "agent": agent,
-            "after_line": after_line,
-            "lines_added": len(new_lines),
-            "timestamp": datetime.now().isoformat(),
-        }
-        self.edit_history.append(edit)
-        self.save()
+        self.version += 1
+        self._record_edit(
+            "insert", agent, insert_idx + 1, insert_idx + len(new_lines),
+            after_line, len(new_lines),
+        )
         
         return {
             "success": True,
@@ -137,18 +512,16 @@ class DocumentEditor:
         
         deleted_content = self.lines[start_idx:end_idx]
         del self.lines[start_idx:end_idx]
+        self._joined_cache = None
+        self._update_counts(deleted_content, [])
+        self._log_splice(start_idx, end_idx, [])
         
         # Log the edit
-        edit = {
-            "operation": "delete",
-            "agent": agent,
-            "start_line": start,
-            "end_line": end,
-            "lines_deleted": len(deleted_content),
-            "timestamp": datetime.now().isoformat(),
-        }
-        self.edit_history.append(edit)
-        self.save()
+        self.version += 1
+        self._record_edit(
+            "delete", agent, start_idx + 1, start_idx,
+            start, end, len(deleted_content),
+        )
         
         return {
             "success": True,
@@ -179,19 +552,16 @@ class DocumentEditor:
         
         # Replace the lines
         self.lines[start_idx:end_idx] = new_lines
+        self._joined_cache = None
+        self._update_counts(old_lines, new_lines)
+        self._log_splice(start_idx, end_idx, new_lines)
         
         # Log the edit
-        edit = {
-            "operation": "replace",
-            "agent": agent,
-            "start_line": start,
-            "end_line": end,
-            "old_line_count": len(old_lines),
-            "new_line_count": len(new_lines),
-            "timestamp": datetime.now().isoformat(),
-        }
-        self.edit_history.append(edit)
-        self.save()
+        self.version += 1
+        self._record_edit(
+            "replace", agent, start_idx + 1, start_idx + len(new_lines),
+            start, end, len(old_lines), len(new_lines),
+        )
         
         return {
             "success": True,
@@ -201,6 +571,41 @@ class DocumentEditor:
             "at_line": start,
         }
     
+    def apply_edits(self, ops: list[dict], agent: str = "unknown") -> list[dict]:
+        """
+        Apply several edits in order and persist them together.
+        
+        Each op names one of EDIT_OPERATIONS under "operation", with that
+        method's arguments alongside; line numbers refer to the document as
+        left by the ops before it. Consecutive edits to the same lines are
+        merged into one log record, and the log is synced once.
+        
+        Args:
+            ops: Edits to apply, e.g. {"operation": "delete_lines", "start": 3, "end": 4}
+            agent: Name of agent making the edits
+            
+        Returns:
+            Result dicts, one per op
+        """
+        results = []
+        self._pending_splices = []
+        try:
+            for op in ops:
+                args = dict(op)
+                operation = args.pop("operation", None)
+                if operation not in EDIT_OPERATIONS:
+                    results.append({"success": False, "error": f"Unknown operation: {operation}"})
+                    continue
+                try:
+                    results.append(getattr(self, operation)(**args, agent=agent))
+                except Exception as e:
+                    results.append({"success": False, "operation": operation, "error": str(e)})
+        finally:
+            splices = _coalesce_splices(self._pending_splices)
+            self._pending_splices = None
+            self._write_splices(splices)
+        return results
+    
     def find_section(self, section_pattern: str) -> Optional[dict]:
         """
         Find a section by header pattern.
@@ -211,30 +616,35 @@ class DocumentEditor:
         Returns:
             Dict with start_line, end_line, header, or None if not found
         """
-        pattern = re.compile(section_pattern, re.IGNORECASE)
-        
-        for i, line in enumerate(self.lines):
-            if pattern.search(line):
-                # Found the section header
-                start_line = i + 1  # 1-indexed
-                
-                # Find the end (next section header or end of document)
-                end_line = len(self.lines)
-                for j in range(i + 1, len(self.lines)):
-                    # Check if this is another section header (## at start)
-                    if self.lines[j].startswith('## ') or self.lines[j].startswith('---'):
-                        end_line = j  # Don't include the next header
-                        break
-                
-                return {
-                    "found": True,
-                    "header": line,
-                    "start_line": start_line,
-                    "end_line": end_line,
-                    "content": '\n'.join(self.lines[i:end_line]),
-                }
+        lookups = self._section_lookups()
+        if section_pattern not in lookups:
+            lookups[section_pattern] = self._scan_section(section_pattern)
+        return dict(lookups[section_pattern])
+    
+    def _scan_section(self, section_pattern: str) -> dict:
+        """Locate the section for find_section by scanning the document."""
+        i = self._find_line(section_pattern)
+        if i is None:
+            return {"found": False, "pattern": section_pattern}
+        
+        # Found the section header
+        start_line = i + 1  # 1-indexed
         
-        return {"found": False, "pattern": section_pattern}
+        # Find the end (next section header or end of document)
+        end_line = len(self.lines)
+        offsets = self._newline_offsets()
+        if i < len(offsets):
+            next_header = _SECTION_END_RE.search(self.get_content(), offsets[i] + 1)
+            if next_header is not None:
+                end_line = bisect.bisect_left(offsets, next_header.start())  # Don't include the next header
+        
+        return {
+            "found": True,
+            "header": self.lines[i],
+            "start_line": start_line,
+            "end_line": end_line,
+            "content": '\n'.join(self.lines[i:end_line]),
+        }
     
     def find_all_sections(self) -> list[dict]:
         """
@@ -243,27 +653,76 @@ class DocumentEditor:
         Returns:
             List of section info dicts
         """
-        sections = []
-        current_section = None
-        
-        for i, line in enumerate(self.lines):
-            if line.startswith('## '):
-                if current_section:
-                    current_section["end_line"] = i
-                    sections.append(current_section)
-                
-                current_section = {
-                    "header": line,
-                    "start_line": i + 1,
-                    "end_line": None,
-                }
-        
-        if current_section:
-            current_section["end_line"] = len(self.lines)
-            sections.append(current_section)
+        lookups = self._section_lookups()
+        if None not in lookups:
+            lookups[None] = self._scan_all_sections()
+        return [dict(section) for section in lookups[None]]
+    
+    def _scan_all_sections(self) -> list[dict]:
+        """Collect every "## " section for find_all_sections."""
+        offsets = self._newline_offsets()
+        sections = [
+            {
+                "header": match.group(),
+                "start_line": bisect.bisect_left(offsets, match.start()) + 1,
+                "end_line": None,
+            }
+            for match in _SECTION_RE.finditer(self.get_content())
+        ]
+        
+        # Each section ends just before the next header
+        for section, next_section in zip(sections, sections[1:]):
+            section["end_line"] = next_section["start_line"] - 1
+        if sections:
+            sections[-1]["end_line"] = len(self.lines)
         
         return sections
     
+    def get_outline(self) -> list[tuple[int, str]]:
+        """
+        Get the document's headings with their line numbers.
+        
+        Returns:
+            List of (line_number, heading) tuples for '#', '##' and '###' headings
+        """
+        return [
+            (i + 1, line)
+            for i, line in enumerate(self.lines)
+            if line.startswith(('# ', '## ', '### '))
+        ]
+    
+    def scan_changes_since(self, version: int) -> dict:
+        """
+        List the edits made after a given document version.
+        
+        Line ranges are as of each edit; later edits above a range shift it.
+        Only the most recent EDIT_HISTORY_MAX_ENTRIES edits are listed.
+        
+        Args:
+            version: Document version to compare against
+            
+        Returns:
+            Dict with the current version and the touched line ranges
+        """
+        changes = [
+            {
+                "version": edit_version,
+                "agent": agent,
+                "operation": operation,
+                "start_line": changed_start,
+                "end_line": changed_end,
+            }
+            for edit_version, agent, operation, (changed_start, changed_end) in zip(
+                self._hist_version, self._hist_agent, self._hist_op, self._hist_range
+            )
+            if edit_version > version
+        ]
+        return {
+            "current_version": self.version,
+            "since_version": version,
+            "changes": changes,
+        }
+    
     def insert_after_pattern(self, pattern: str, content: str, agent: str = "unknown") -> dict:
         """
         Insert content after the first line matching a pattern.
@@ -276,18 +735,25 @@ class DocumentEditor:
         Returns:
             Dict with operation result
         """
-        regex = re.compile(pattern, re.IGNORECASE)
-        
-        for i, line in enumerate(self.lines):
-            if regex.search(line):
-                return self.insert_lines(i + 1, content, agent)
+        i = self._find_line(pattern)
+        if i is not None:
+            return self.insert_lines(i + 1, content, agent)
         
         return {"success": False, "error": f"Pattern not found: {pattern}"}
     
     def clear(self) -> None:
         """Clear the document."""
         self.lines = []
-        self.edit_history = []
+        self._joined_cache = None
+        self._counts = _count_markers(self.lines)
+        for column in (
+            self._hist_op, self._hist_agent, self._hist_version,
+            self._hist_range, self._hist_ts, self._hist_meta,
+        ):
+            column.clear()
+        if self._history_path is not None and os.path.exists(self._history_path):
+            os.remove(self._history_path)
+        self.version += 1
         self.save()
     
     def set_content(self, content: str, agent: str = "unknown") -> dict:
@@ -302,25 +768,118 @@ class DocumentEditor:
             Dict with operation result
         """
         self.lines = content.split('\n')
+        self._joined_cache = content
+        self._counts = _count_markers(self.lines)
         
-        edit = {
+        self.version += 1
+        self._record_edit("set_content", agent, 1, len(self.lines), len(self.lines))
+        self.save()
+        
+        return {
+            "success": True,
             "operation": "set_content",
-            "agent": agent,
             "line_count": len(self.lines),
-            "timestamp": datetime.now().isoformat(),
         }
-        self.edit_history.append(edit)
+    
+    def fork(self) -> "DocumentEditor":
+        """
+        Create an in-memory copy for an agent to edit in isolation.
+        
+        Returns:
+            DocumentEditor holding a copy of the current lines and version
+        """
+        fork = DocumentEditor(None)
+        fork.lines = list(self.lines)
+        fork._joined_cache = self._joined_cache
+        fork._counts = dict(self._counts)
+        fork.version = self.version
+        return fork
+    
+    def merge(self, forks: list[tuple[str, "DocumentEditor"]]) -> dict:
+        """
+        Three-way merge edits made on forks back into this document.
+        
+        The current lines are the merge base, so this document must not have
+        been edited since the forks were taken. Insertions from different forks
+        at the same point are kept in fork order; when edits overlap, the
+        earlier fork wins and the later one is reported as a conflict.
+        
+        Args:
+            forks: (agent, fork) pairs in priority order
+            
+        Returns:
+            Dict with operation result and any conflicts
+        """
+        base = self.lines
+        hunks = []
+        for priority, (agent, fork) in enumerate(forks):
+            matcher = difflib.SequenceMatcher(None, base, fork.lines, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag != "equal":
+                    hunks.append((i1, i2, priority, agent, fork.lines[j1:j2]))
+        hunks.sort(key=lambda hunk: hunk[:3])
+        
+        accepted = []
+        conflicts = []
+        for hunk in hunks:
+            i1, i2, priority, agent, _ = hunk
+            winner = next(
+                (
+                    other for other in accepted
+                    if other[2] != priority
+                    and not (i1 == i2 and other[0] == other[1])
+                    and other[0] < i2 and i1 < other[1]
+                ),
+                None,
+            )
+            if winner is None:
+                accepted.append(hunk)
+            else:
+                conflicts.append({
+                    "agent": agent,
+                    "kept_agent": winner[3],
+                    "base_start": i1 + 1,
+                    "base_end": i2,
+                })
+        
+        merged: list[str] = []
+        cursor = 0
+        for i1, i2, _, agent, new_lines in accepted:
+            merged.extend(base[cursor:i1])
+            start = len(merged)
+            merged.extend(new_lines)
+            self._update_counts(base[i1:i2], new_lines)
+            cursor = i2
+            
+            self.version += 1
+            self._record_edit("merge", agent, start + 1, len(merged), i2 - i1, len(new_lines))
+        merged.extend(base[cursor:])
+        
+        self.lines = merged
+        self._joined_cache = None
         self.save()
         
         return {
             "success": True,
-            "operation": "set_content",
-            "line_count": len(self.lines),
+            "operation": "merge",
+            "hunks_applied": len(accepted),
+            "conflicts": conflicts,
         }
     
-    def get_edit_history(self) -> list[dict]:
-        """Get the edit history."""
-        return self.edit_history
+    def get_edit_history(self, since_version: int = 0) -> list[dict]:
+        """
+        Get the recent edit history (up to EDIT_HISTORY_MAX_ENTRIES edits).
+        
+        Args:
+            since_version: Only include edits that produced a later version
+            
+        Returns:
+            Edit entries, oldest first
+        """
+        start = len(self._hist_version)
+        while start and self._hist_version[start - 1] > since_version:
+            start -= 1
+        return [self._edit_entry(i) for i in range(start, len(self._hist_op))]
 
 
 # Tool definitions for Gemini function calling
@@ -442,6 +1001,20 @@ DOCUMENT_TOOLS = [
             "required": ["pattern", "content"],
         },
     },
+    {
+        "name": "scan_changes_since",
+        "description": "List the line ranges edited (by any agent) since a given document version. Useful to review only what changed instead of re-reading the whole document.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "version": {
+                    "type": "integer",
+                    "description": "Document version to compare against (shown in the document state header)",
+                },
+            },
+            "required": ["version"],
+        },
+    },
     {
         "name": "editing_complete",
         "description": "Signal that you have finished all your edits to the document.",
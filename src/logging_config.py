@@ -0,0 +1,68 @@
+"""
+Logging setup - hands agent log records to a background thread for output.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+
+LOGGER_NAME = "hollywoodai"
+
+# Records under this logger are raw text fragments (e.g. streamed model
+# output), written as is without a trailing newline
+STREAM_LOGGER_NAME = f"{LOGGER_NAME}.stream"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted.
+
+    The stock handler formats each record in the calling thread so it can be
+    pickled; the queue here never leaves the process, so formatting is left
+    to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    Route the "hollywoodai" logger through a queue drained by a background thread.
+
+    Safe to call more than once; only the first call installs the handlers.
+
+    Args:
+        level: Minimum level to emit
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    # The pipeline writes its progress to stdout synchronously; records from
+    # the listener thread go to stderr so they never interleave with it
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    stream_handler.addFilter(lambda record: not record.name.startswith(STREAM_LOGGER_NAME))
+    
+    # Fragments share the listener thread, so they stay in order with the rest
+    fragment_handler = logging.StreamHandler(sys.stderr)
+    fragment_handler.terminator = ""
+    fragment_handler.addFilter(logging.Filter(STREAM_LOGGER_NAME))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, fragment_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
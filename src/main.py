@@ -11,9 +11,13 @@ import argparse
 import os
 import sys
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from .config import TOTAL_DRAFTS, FINAL_STORY_PATH, OUTPUT_DIR
-from .orchestration import EditorPipeline
+from .logging_config import setup_logging
+
+if TYPE_CHECKING:
+    from .orchestration import EditorPipeline
 
 
 def print_banner():
@@ -30,42 +34,47 @@ def print_banner():
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """
-    print(banner)
+    sys.stdout.write(banner + "\n")
 
 
-def print_summary(pipeline: EditorPipeline, final_path: str, total_time: float):
+def print_summary(pipeline: "EditorPipeline", final_path: str, total_time: float):
     """Print a summary of the run."""
-    print("\n" + "="*60)
-    print("RUN SUMMARY")
-    print("="*60)
-    
-    print(f"\nTotal Drafts: {len(pipeline.history)}")
-    print(f"Total Time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
+    # Collected and written in one go
+    lines = [
+        "\n" + "="*60,
+        "RUN SUMMARY",
+        "="*60,
+        f"\nTotal Drafts: {len(pipeline.history)}",
+        f"Total Time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)",
+    ]
     if pipeline.history:
-        print(f"Average Time per Draft: {total_time/len(pipeline.history):.1f} seconds")
+        lines.append(f"Average Time per Draft: {total_time/len(pipeline.history):.1f} seconds")
     
     # Engagement score progression
-    scores = [h.get("engagement_score") for h in pipeline.history if h.get("engagement_score")]
+    scores = [h.engagement_score for h in pipeline.history if h.engagement_score]
     if scores:
-        print(f"\nEngagement Score Progression: {' → '.join(str(s) for s in scores)}")
-        print(f"Starting Score: {scores[0]}/10")
-        print(f"Final Score: {scores[-1]}/10")
+        lines.append(f"\nEngagement Score Progression: {' → '.join(str(s) for s in scores)}")
+        lines.append(f"Starting Score: {scores[0]}/10")
+        lines.append(f"Final Score: {scores[-1]}/10")
         if len(scores) > 1:
             improvement = scores[-1] - scores[0]
-            print(f"Improvement: {'+' if improvement >= 0 else ''}{improvement} points")
+            lines.append(f"Improvement: {'+' if improvement >= 0 else ''}{improvement} points")
     
     # Final draft stats
     if pipeline.history:
         final = pipeline.history[-1]
-        print(f"\nFinal Draft Stats:")
-        print(f"  Scenes: {final.get('scene_count', 'N/A')}")
-        print(f"  Visual Directions: {final.get('visual_count', 'N/A')}")
-        print(f"  Audio Directions: {final.get('audio_count', 'N/A')}")
+        lines.append(f"\nFinal Draft Stats:")
+        lines.append(f"  Scenes: {final.scene_count}")
+        lines.append(f"  Visual Directions: {final.visual_count}")
+        lines.append(f"  Audio Directions: {final.audio_count}")
+    
+    lines.append(f"\nFinal Story: {final_path}")
+    lines.append(f"All Drafts: {os.path.join(OUTPUT_DIR, 'drafts/')}")
+    lines.append(f"Pipeline History: {os.path.join(OUTPUT_DIR, 'pipeline_history.json')}")
+    lines.append("="*60)
     
-    print(f"\nFinal Story: {final_path}")
-    print(f"All Drafts: {os.path.join(OUTPUT_DIR, 'drafts/')}")
-    print(f"Pipeline History: {os.path.join(OUTPUT_DIR, 'pipeline_history.json')}")
-    print("="*60)
+    sys.stdout.writelines(line + "\n" for line in lines)
+    sys.stdout.flush()
 
 
 def main():
@@ -94,6 +103,7 @@ def main():
     
     args = parser.parse_args()
     
+    setup_logging()
     print_banner()
     
     # Validate API key
@@ -109,8 +119,10 @@ def main():
         import src.config as config
         config.TOTAL_DRAFTS = args.drafts
     
-    # Initialize pipeline
+    # Initialize pipeline (imported here: loading the Gemini SDK takes a
+    # noticeable fraction of a second, which --help and usage errors skip)
     print("Initializing pipeline...")
+    from .orchestration import EditorPipeline
     try:
         pipeline = EditorPipeline(api_key=api_key)
     except Exception as e:
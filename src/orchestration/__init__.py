@@ -1,3 +1,3 @@
-from .editor_pipeline import EditorPipeline
+from .editor_pipeline import EditorPipeline, run_batch, run_batch_async
 
-__all__ = ["EditorPipeline"]
+__all__ = ["EditorPipeline", "run_batch", "run_batch_async"]
@@ -2,31 +2,201 @@
 Editor Pipeline - Uses document editing tools instead of full regeneration.
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import os
 import json
+import re
 import shutil
+import sys
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
 from ..config import (
     GEMINI_API_KEY,
     TOTAL_DRAFTS,
-    DRAFTS_DIR,
-    FINAL_STORY_PATH,
+    MIN_DRAFTS,
+    MAX_CONCURRENT_STORIES,
     OUTPUT_DIR,
     MODEL_NAME,
     THINKING_LEVEL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    GEMINI_RETRY_ATTEMPTS,
+    GEMINI_RETRY_INITIAL_DELAY_SECONDS,
+    GEMINI_RETRY_MAX_DELAY_SECONDS,
+    GEMINI_TIMEOUT_SECONDS,
     AUDIENCE_SIM_SYSTEM_PROMPT,
+    CHECKER_BATCH_MODE,
+    CHECKER_SKIP_CLEAN_DRAFTS,
+    CHECKER_SAFETY_INTERVAL,
+    AUDIENCE_BATCH_MODE,
+    BATCH_POLL_INTERVAL_SECONDS,
+    FEEDBACK_CACHE_ENABLED,
+    FEEDBACK_CACHE_TTL_SECONDS,
 )
 from ..context.manager import ContextManager
+from ..context.prompt_cache import PromptCache
+from ..context.response_cache import ResponseCache
 from ..document.editor import DocumentEditor
 from ..agents.researcher import ResearcherAgent
 from ..agents.writer_editor import WriterEditorAgent
 from ..agents.designer_editor import DesignerEditorAgent
 from ..agents.composer_editor import ComposerEditorAgent
 from ..agents.checker_editor import CheckerEditorAgent
+from ..agents.editor_agent import BATCH_DONE_STATES
+
+
+# Structured audience feedback; the prose fields come before the verdicts
+# so the model reasons about the script before scoring it
+AUDIENCE_FEEDBACK_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "overall_impression": types.Schema(type=types.Type.STRING),
+        "plot_hole_analysis": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+        ),
+        "plot_holes_found": types.Schema(type=types.Type.BOOLEAN),
+        "whats_working": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+        ),
+        "areas_for_improvement": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+        ),
+        "priority": types.Schema(type=types.Type.STRING),
+        "engagement_score": types.Schema(type=types.Type.INTEGER, minimum=1, maximum=10),
+        "ready_for_production": types.Schema(type=types.Type.BOOLEAN),
+    },
+    property_ordering=[
+        "overall_impression", "plot_hole_analysis", "plot_holes_found",
+        "whats_working", "areas_for_improvement", "priority",
+        "engagement_score", "ready_for_production",
+    ],
+    required=[
+        "overall_impression", "plot_hole_analysis", "plot_holes_found",
+        "whats_working", "areas_for_improvement", "priority",
+        "engagement_score", "ready_for_production",
+    ],
+)
+
+AUDIENCE_CONFIG_KWARGS = {
+    "thinking_config": types.ThinkingConfig(thinking_level=THINKING_LEVEL),
+    "response_mime_type": "application/json",
+    "response_schema": AUDIENCE_FEEDBACK_SCHEMA,
+}
+
+
+def _bullets(items: Optional[list[str]]) -> str:
+    """Format a feedback list as markdown bullets."""
+    return "\n".join(f"- {item}" for item in items or []) or "- None"
+
+
+def _render_feedback(data: dict, draft_num: int) -> str:
+    """
+    Render structured audience feedback as the markdown the Writer revises from.
+    
+    Args:
+        data: Parsed AUDIENCE_FEEDBACK_SCHEMA object
+        draft_num: Draft the feedback is for
+        
+    Returns:
+        Markdown feedback
+    """
+    def yes_no(value: Optional[bool]) -> str:
+        return "N/A" if value is None else ("yes" if value else "no")
+    
+    return f"""# Audience Feedback - Draft {draft_num}
+
+## Overall Impression
+{data.get("overall_impression", "")}
+
+## Plot Hole Check
+{_bullets(data.get("plot_hole_analysis"))}
+
+Plot holes found: {yes_no(data.get("plot_holes_found"))}
+
+## What's Working
+{_bullets(data.get("whats_working"))}
+
+## Areas for Improvement
+{_bullets(data.get("areas_for_improvement"))}
+
+## Priority for Next Draft
+{data.get("priority", "")}
+
+## Engagement Score: {data.get("engagement_score", "N/A")}/10
+Ready for production: {yes_no(data.get("ready_for_production"))}"""
+
+
+def _summarize_feedback(data: dict) -> str:
+    """
+    Condense structured audience feedback to what the next review checks against.
+    
+    Strengths and a clean plot-hole check are dropped, so the audience prompt
+    stays the same size however many drafts came before.
+    
+    Args:
+        data: Parsed AUDIENCE_FEEDBACK_SCHEMA object
+        
+    Returns:
+        Short markdown summary
+    """
+    sections = [f"Overall: {data.get('overall_impression', '')}"]
+    if data.get("plot_holes_found"):
+        sections.append(f"Plot holes:\n{_bullets(data.get('plot_hole_analysis'))}")
+    sections.append(f"Areas for improvement:\n{_bullets(data.get('areas_for_improvement'))}")
+    sections.append(f"Priority: {data.get('priority', '')}")
+    return "\n".join(sections)
+
+
+def _emit(*lines: str) -> None:
+    """Write a block of progress lines with a single write to stdout."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+# Feedback concerns the Checker exists to fix
+_CHECKER_ISSUE_RE = re.compile(r"plot hole|format|consisten|continuity|contradict", re.IGNORECASE)
+
+
+# Stands in for audience feedback on revisions when it is deferred to a batch job
+DEFERRED_FEEDBACK = """No audience feedback is available for this draft; it will be collected for all drafts after the final one.
+Revise on your own judgement: close any plot holes, tighten the pacing, and sharpen the dialogue."""
+
+
+@dataclass(slots=True)
+class DraftResult:
+    """Outcome of one draft, as kept in EditorPipeline.history."""
+    draft_num: int
+    feedback: str
+    feedback_summary: str
+    engagement_score: Optional[int]
+    plot_holes_found: Optional[bool]
+    ready_for_production: Optional[bool]
+    priority: Optional[str]
+    visual_count: int
+    audio_count: int
+    scene_count: int
+    duration_seconds: float
+    merge_conflicts: list[dict]
+    checker_noop: Optional[bool]  # Checker left the draft unchanged; None if skipped
+    edits_path: str  # The draft's edits, one JSON object per line
+
+
+# DraftResult fields written to pipeline_history.json(l)
+_PERSISTED_FIELDS = (
+    "draft_num", "engagement_score", "plot_holes_found", "ready_for_production",
+    "priority", "visual_count", "audio_count", "scene_count", "duration_seconds",
+    "checker_noop",
+)
 
 
 class EditorPipeline:
@@ -37,12 +207,13 @@ class EditorPipeline:
     instead of regenerating the full content each time.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, output_dir: str = OUTPUT_DIR):
         """
         Initialize the pipeline.
         
         Args:
             api_key: Optional Gemini API key
+            output_dir: Directory for this story's drafts, history and final script
         """
         api_key = api_key or GEMINI_API_KEY
         if not api_key:
@@ -50,30 +221,125 @@ class EditorPipeline:
                 "GEMINI_API_KEY not found. Set it in your environment or .env file."
             )
         
-        self.client = genai.Client(api_key=api_key)
+        self.client = genai.Client(api_key=api_key, http_options=self._build_http_options())
         self.context_manager = ContextManager(self.client)
         
+        # The audience prompt is identical for every draft's feedback call
+        self.audience_cache = PromptCache(self.client, AUDIENCE_SIM_SYSTEM_PROMPT)
+        
+        # Parsed audience feedback, keyed by the exact draft it reviewed
+        self.feedback_cache = (
+            ResponseCache("feedback_cache", FEEDBACK_CACHE_TTL_SECONDS)
+            if FEEDBACK_CACHE_ENABLED else None
+        )
+        
         # Initialize agents
-        self.researcher = ResearcherAgent(self.client, self.context_manager)
         self.writer = WriterEditorAgent(self.client, self.context_manager)
         self.designer = DesignerEditorAgent(self.client, self.context_manager)
         self.composer = ComposerEditorAgent(self.client, self.context_manager)
         self.checker = CheckerEditorAgent(self.client, self.context_manager)
         
-        # Working document path
-        self.working_doc_path = os.path.join(OUTPUT_DIR, "working_draft.md")
+        # Output paths
+        self.output_dir = output_dir
+        self.drafts_dir = os.path.join(output_dir, "drafts")
+        self.working_doc_path = os.path.join(output_dir, "working_draft.md")
+        self.final_story_path = os.path.join(output_dir, "final_story.md")
+        
+        # One line per completed draft, appended as the run goes
+        self.history_log_path = os.path.join(output_dir, "pipeline_history.jsonl")
         
         # Ensure directories exist
-        os.makedirs(DRAFTS_DIR, exist_ok=True)
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        os.makedirs(self.drafts_dir, exist_ok=True)
         
         # History
-        self.history: list[dict] = []
+        self.history: list[DraftResult] = []
         self.research: str = ""
+        
+        # (history entry, content) of drafts awaiting batched audience feedback
+        self._deferred_feedback: list[tuple[DraftResult, str]] = []
+        
+        # Draft the agents' contexts were last checked and offloaded for
+        self._context_managed_for: Optional[int] = None
+    
+    @functools.cached_property
+    def researcher(self) -> ResearcherAgent:
+        """Researcher, created on first use; runs without a prompt never need it."""
+        return ResearcherAgent(self.client, self.context_manager)
     
-    def _get_audience_feedback(self, content: str, draft_num: int, previous_feedback: str) -> dict:
+    @staticmethod
+    def _build_http_options() -> types.HttpOptions:
         """
-        Get audience feedback (read-only, no editing).
+        Build HTTP options giving every agent one pooled async transport.
+        
+        Concurrent agent calls reuse keep-alive connections instead of opening
+        a new TLS connection each, and share a single HTTP/2 connection when
+        the optional h2 package is installed. The pool size also caps how many
+        requests are in flight at once.
+        
+        Every request made through the client is retried with jittered
+        exponential backoff on rate limits, server errors and dropped
+        connections, and gives up after GEMINI_TIMEOUT_SECONDS.
+        
+        Returns:
+            HttpOptions for the shared Gemini client
+        """
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            http2=importlib.util.find_spec("h2") is not None,
+        )
+        # Passing a transport also keeps the SDK on httpx rather than aiohttp
+        return types.HttpOptions(
+            async_client_args={"transport": transport},
+            timeout=GEMINI_TIMEOUT_SECONDS * 1000,  # milliseconds
+            retry_options=types.HttpRetryOptions(
+                attempts=GEMINI_RETRY_ATTEMPTS,
+                initial_delay=GEMINI_RETRY_INITIAL_DELAY_SECONDS,
+                max_delay=GEMINI_RETRY_MAX_DELAY_SECONDS,
+            ),
+        )
+    
+    @staticmethod
+    def _content_digest(content: str) -> bytes:
+        """
+        Hash draft content for cheap equality checks.
+        
+        Args:
+            content: Draft content
+            
+        Returns:
+            16-byte BLAKE2b digest
+        """
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+    
+    @staticmethod
+    def _feedback_cache_key(content: str, draft_num: int, previous_feedback: str) -> str:
+        """
+        Build the feedback cache key for one audience request.
+        
+        The draft number is part of the key because it appears in the prompt
+        and in the feedback's headings.
+        
+        Args:
+            content: Draft content under review
+            draft_num: Current draft number
+            previous_feedback: Previous feedback shown to the audience
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (str(draft_num), content, previous_feedback):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _audience_prompt(content: str, draft_num: int, previous_feedback: str) -> str:
+        """
+        Build the audience feedback request for one draft.
         
         Args:
             content: Current draft content
@@ -81,9 +347,9 @@ class EditorPipeline:
             previous_feedback: Previous feedback for comparison
             
         Returns:
-            Dict with feedback
+            Prompt text
         """
-        prompt = f"""## AUDIENCE FEEDBACK REQUEST - Draft {draft_num}
+        return f"""## AUDIENCE FEEDBACK REQUEST - Draft {draft_num}
 
 Watch this short film as an audience member and provide feedback.
 
@@ -93,122 +359,258 @@ Watch this short film as an audience member and provide feedback.
 
 {"### Your Previous Feedback (Draft " + str(draft_num - 1) + "):" + chr(10) + previous_feedback + chr(10) + "Consider whether your previous concerns have been addressed." if previous_feedback else ""}
 
-Provide structured feedback. Use XML tags for key metrics that need to be extracted:
-
-# Audience Feedback - Draft {draft_num}
-
-## Overall Impression
-[2-3 sentences on gut reaction]
-
-## Plot Hole Check (REQUIRED)
-Ask yourself: "Why don't they just...?"
-- [List ANY logical gaps]
-- [If a character forgets something, can another character tell them?]
-- [Write "None found" ONLY if genuinely no issues]
-
-<plot_holes_found>true or false</plot_holes_found>
-
-## What's Working
-- [Strength 1]
-- [Strength 2]
-- [Strength 3]
-
-## Areas for Improvement
-- [Issue 1]: [Suggestion]
-- [Issue 2]: [Suggestion]
-
-## Priority for Next Draft
-<priority>[Single most important thing to address]</priority>
-
-<engagement_score>[1-10, integer only. Major plot hole = max score 6]</engagement_score>
-
-<ready_for_production>true or false</ready_for_production>"""
-
-        response = self.client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=AUDIENCE_SIM_SYSTEM_PROMPT,
-                thinking_config=types.ThinkingConfig(thinking_level=THINKING_LEVEL),
-            ),
-        )
+Provide your structured feedback as JSON. Check for plot holes first ("Why don't they just...?"), and remember that a major plot hole caps the engagement score at 6."""
+    
+    @staticmethod
+    def _parse_feedback(raw: Optional[str], draft_num: int) -> dict:
+        """
+        Turn a structured audience response into the feedback result.
         
-        feedback = response.text
-        
-        # Extract structured data from XML tags
-        import re
-        
-        def extract_xml_tag(text: str, tag: str) -> str | None:
-            """Extract content from an XML tag."""
-            match = re.search(rf"<{tag}>\s*(.*?)\s*</{tag}>", text, re.DOTALL | re.IGNORECASE)
-            return match.group(1).strip() if match else None
-        
-        def extract_bool(text: str, tag: str) -> bool | None:
-            """Extract boolean from XML tag."""
-            value = extract_xml_tag(text, tag)
-            if value is None:
-                return None
-            return value.lower() in ("true", "yes", "1")
-        
-        def extract_int(text: str, tag: str) -> int | None:
-            """Extract integer from XML tag."""
-            value = extract_xml_tag(text, tag)
-            if value is None:
-                return None
-            # Handle cases like "7/10" or "7 out of 10"
-            match = re.search(r"(\d+)", value)
-            return int(match.group(1)) if match else None
-        
-        engagement_score = extract_int(feedback, "engagement_score")
-        plot_holes_found = extract_bool(feedback, "plot_holes_found")
-        ready_for_production = extract_bool(feedback, "ready_for_production")
-        priority = extract_xml_tag(feedback, "priority")
+        Args:
+            raw: JSON response text (AUDIENCE_FEEDBACK_SCHEMA)
+            draft_num: Draft the feedback is for
+            
+        Returns:
+            Dict with rendered feedback, its summary and its metrics (None where missing)
+        """
+        try:
+            data = json.loads(raw or "{}")
+        except json.JSONDecodeError as e:
+            print(f"Warning: Audience feedback was not valid JSON ({e})")
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
         
         return {
-            "feedback": feedback,
-            "engagement_score": engagement_score,
-            "plot_holes_found": plot_holes_found,
-            "ready_for_production": ready_for_production,
-            "priority": priority,
+            "feedback": _render_feedback(data, draft_num) if data else (raw or ""),
+            "summary": _summarize_feedback(data) if data else (raw or ""),
+            "engagement_score": data.get("engagement_score"),
+            "plot_holes_found": data.get("plot_holes_found"),
+            "ready_for_production": data.get("ready_for_production"),
+            "priority": data.get("priority"),
         }
     
-    def run_research(self, user_message: str) -> str:
+    async def _get_audience_feedback(self, content: str, draft_num: int, previous_feedback: str) -> dict:
+        """
+        Get audience feedback (read-only, no editing).
+        
+        Args:
+            content: Current draft content
+            draft_num: Current draft number
+            previous_feedback: Previous feedback for comparison
+            
+        Returns:
+            Dict with feedback
+        """
+        cache_key = self._feedback_cache_key(content, draft_num, previous_feedback)
+        if self.feedback_cache is not None:
+            cached = self.feedback_cache.get(cache_key)
+            if cached is not None:
+                print(f"  ⚡ Reusing cached audience feedback for Draft {draft_num}")
+                return json.loads(cached)
+        
+        prompt = self._audience_prompt(content, draft_num, previous_feedback)
+
+        config = await self.audience_cache.aconfig(**AUDIENCE_CONFIG_KWARGS)
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=MODEL_NAME, contents=prompt, config=config
+            )
+        except errors.ClientError as e:
+            if e.code != 404 or not config.cached_content:
+                raise
+            # The provider dropped the cache early; recreate it and retry once
+            self.audience_cache.invalidate()
+            response = await self.client.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=await self.audience_cache.aconfig(**AUDIENCE_CONFIG_KWARGS),
+            )
+        
+        result = self._parse_feedback(response.text, draft_num)
+        
+        if self.feedback_cache is not None:
+            self.feedback_cache.put(cache_key, json.dumps(result))
+        
+        return result
+    
+    @staticmethod
+    def _print_feedback(audience_result: dict) -> None:
+        """Print the audience feedback and its extracted metrics."""
+        _emit(
+            f"\nOUTPUT:\nFeedback: {audience_result['feedback'][:500]}...",
+            f"  <engagement_score>: {audience_result.get('engagement_score', 'N/A')}",
+            f"  <plot_holes_found>: {audience_result.get('plot_holes_found', 'N/A')}",
+            f"  <ready_for_production>: {audience_result.get('ready_for_production', 'N/A')}",
+            f"  <priority>: {audience_result.get('priority', 'N/A')}",
+            "-" * 60,
+        )
+    
+    def _write_draft(self, draft_num: int, content: str, feedback: str) -> str:
+        """
+        Save a draft version, with its feedback as an HTML comment.
+        
+        Args:
+            draft_num: Draft number
+            content: Draft content
+            feedback: Audience feedback, or "" if not collected yet
+            
+        Returns:
+            Path to the saved draft
+        """
+        draft_path = os.path.join(self.drafts_dir, f"draft_{draft_num:02d}.md")
+        footer = f"\n\n---\n\n<!-- AUDIENCE FEEDBACK\n{feedback}\n-->" if feedback else ""
+        with open(draft_path, 'w', encoding='utf-8') as f:
+            f.write(content + footer)
+        return draft_path
+    
+    def _write_edits(self, draft_num: int, edits: list[dict]) -> str:
+        """
+        Save a draft's edit history next to the draft.
+        
+        Args:
+            draft_num: Draft number
+            edits: Edit history entries made during the draft
+            
+        Returns:
+            Path to the saved edits
+        """
+        edits_path = os.path.join(self.drafts_dir, f"draft_{draft_num:02d}.edits.jsonl")
+        with open(edits_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(edit, ensure_ascii=False) + "\n" for edit in edits)
+        return edits_path
+    
+    def _apply_feedback(self, result: DraftResult, content: str, audience_result: dict) -> None:
+        """Fill a deferred draft's history entry and saved file with its feedback."""
+        for key in ("feedback", "engagement_score", "plot_holes_found", "ready_for_production", "priority"):
+            setattr(result, key, audience_result.get(key))
+        result.feedback_summary = audience_result.get("summary", result.feedback)
+        print(f"\nDraft {result.draft_num}:")
+        self._print_feedback(audience_result)
+        print(f"  Draft saved: {self._write_draft(result.draft_num, content, result.feedback)}")
+        self._log_history(result)
+    
+    async def _collect_deferred_feedback(self) -> None:
+        """
+        Get the audience feedback for every deferred draft in one Batch API job.
+        
+        Polls until the job finishes, which can take minutes. Drafts whose
+        batched request failed are reviewed interactively instead. Deferred
+        drafts are reviewed without previous feedback, since none of it
+        exists when the job is submitted.
+        """
+        deferred, self._deferred_feedback = self._deferred_feedback, []
+        if not deferred:
+            return
+        
+        _emit(
+            "\n" + "="*60,
+            "AUDIENCE FEEDBACK (BATCH)",
+            "="*60,
+        )
+        
+        pending = []  # (history entry, content, cache_key) sent in the batch
+        for result, content in deferred:
+            cache_key = self._feedback_cache_key(content, result.draft_num, "")
+            cached = self.feedback_cache.get(cache_key) if self.feedback_cache is not None else None
+            if cached is not None:
+                print(f"  ⚡ Reusing cached audience feedback for Draft {result.draft_num}")
+                self._apply_feedback(result, content, json.loads(cached))
+            else:
+                pending.append((result, content, cache_key))
+        
+        if not pending:
+            return
+        
+        # Sent inline: the job can outlive the provider-side prompt cache
+        config = self.audience_cache.build_config(None, **AUDIENCE_CONFIG_KWARGS)
+        job = await self.client.aio.batches.create(
+            model=MODEL_NAME,
+            src=[
+                types.InlinedRequest(
+                    contents=self._audience_prompt(content, result.draft_num, ""),
+                    config=config,
+                )
+                for result, content, _ in pending
+            ],
+            config=types.CreateBatchJobConfig(display_name="audience-feedback"),
+        )
+        print(f"  Submitted batch job {job.name} ({len(pending)} draft(s)), polling every {BATCH_POLL_INTERVAL_SECONDS}s")
+        while job.state not in BATCH_DONE_STATES:
+            await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+            job = await self.client.aio.batches.get(name=job.name)
+        
+        responses = job.dest.inlined_responses if job.dest and job.dest.inlined_responses else []
+        for n, (result, content, cache_key) in enumerate(pending):
+            inlined = responses[n] if n < len(responses) else None
+            feedback = inlined.response.text if inlined and not inlined.error and inlined.response else None
+            if not feedback:
+                print(f"Warning: Batched feedback for Draft {result.draft_num} failed, requesting it interactively")
+                audience_result = await self._get_audience_feedback(content, result.draft_num, "")
+            else:
+                audience_result = self._parse_feedback(feedback, result.draft_num)
+                if self.feedback_cache is not None:
+                    self.feedback_cache.put(cache_key, json.dumps(audience_result))
+            self._apply_feedback(result, content, audience_result)
+    
+    async def run_research(self, user_message: str) -> str:
         """Run the research phase."""
         if not user_message:
             return ""
         
-        print("\n" + "="*60)
-        print("RESEARCH PHASE")
-        print("="*60)
-        
-        print(f"\nINPUT:\nUser Message: {user_message}")
-        result = self.researcher.call({
+        _emit(
+            "\n" + "="*60,
+            "RESEARCH PHASE",
+            "="*60,
+            f"\nINPUT:\nUser Message: {user_message}",
+        )
+        result = await self.researcher.acall({
             "message": user_message,
             "draft_num": 0,
         })
         
-        print(f"\nOUTPUT:\n{result}")
-        print("-" * 60)
+        _emit(
+            f"\nOUTPUT:\n{result}",
+            "-" * 60,
+        )
         
         self.research = result.get("research", "")
         
         if self.research:
-            research_path = os.path.join(OUTPUT_DIR, "research_brief.md")
+            research_path = os.path.join(self.output_dir, "research_brief.md")
             with open(research_path, 'w', encoding='utf-8') as f:
                 f.write(self.research)
             print(f"  Research saved: {research_path}")
         
         return self.research
     
-    def run_draft(
+    async def _manage_agent_contexts(self, draft_num: int) -> None:
+        """
+        Offload every editing agent that is over its context threshold.
+        
+        The summaries are generated concurrently rather than one by one as
+        each agent's turn comes up.
+        
+        Args:
+            draft_num: Draft the agents are being prepared for
+        """
+        await asyncio.gather(*(
+            agent.manage_context(draft_num)
+            for agent in (self.writer, self.designer, self.composer, self.checker)
+        ))
+        self._context_managed_for = draft_num
+    
+    async def run_draft(
         self,
         editor: DocumentEditor,
         draft_num: int,
         total_drafts: int,
         previous_feedback: str = "",
+        previous_summary: str = "",
         user_message: str = "",
-        research: str = "",
-    ) -> dict:
+        defer_feedback: bool = False,
+        run_checker: bool = True,
+    ) -> DraftResult:
         """
         Run a single draft through all editing agents.
         
@@ -217,124 +619,217 @@ Ask yourself: "Why don't they just...?"
             draft_num: Current draft number
             total_drafts: Total number of drafts
             previous_feedback: Feedback from previous draft
+            previous_summary: Condensed previous feedback shown to the audience
+                (defaults to previous_feedback)
             user_message: Initial user prompt (first draft only)
-            research: Research brief (first draft only)
+            defer_feedback: Leave audience feedback to _collect_deferred_feedback()
+            run_checker: Whether to run the Checker pass (see _checker_needed())
             
         Returns:
-            Dict with results
+            The draft's DraftResult
         """
-        print(f"\n{'='*60}")
-        print(f"DRAFT {draft_num} of {total_drafts}")
-        print(f"{'='*60}")
+        _emit(
+            f"\n{'='*60}",
+            f"DRAFT {draft_num} of {total_drafts}",
+            f"{'='*60}",
+        )
         
         start_time = datetime.now()
+        start_version = editor.version
+        
+        if self._context_managed_for != draft_num:
+            await self._manage_agent_contexts(draft_num)
         
         # Step 1: Writer
-        print(f"\n[1/5] Writer - {'Creating' if draft_num == 1 else 'Revising'} narrative...")
-        print("-" * 60)
         if draft_num == 1:
-            writer_input = f"User Message: {user_message}\nResearch: {research[:200] if research else 'None'}..."
-            print(f"INPUT:\n{writer_input}")
-            writer_result = self.writer.create_initial_draft(
-                editor, user_message, research, draft_num, total_drafts
-            )
+            writer_input = f"User Message: {user_message}\nResearch: {'in the cached system prompt' if self.writer.research else 'None'}"
         else:
             writer_input = f"Feedback: {previous_feedback[:300]}..."
-            print(f"INPUT:\n{writer_input}")
-            writer_result = self.writer.revise_draft(
+        _emit(
+            f"\n[1/5] Writer - {'Creating' if draft_num == 1 else 'Revising'} narrative...",
+            "-" * 60,
+            f"INPUT:\n{writer_input}",
+        )
+        if draft_num == 1:
+            writer_result = await self.writer.create_initial_draft(
+                editor, user_message, draft_num, total_drafts
+            )
+        else:
+            writer_result = await self.writer.revise_draft(
                 editor, previous_feedback, draft_num, total_drafts
             )
-        print(f"\nOUTPUT:\n{writer_result}")
-        print("-" * 60)
+        _emit(
+            f"\nOUTPUT:\n{writer_result}",
+            "-" * 60,
+        )
         
-        # Step 2: Designer
-        print("\n[2/5] Designer - Adding visual direction...")
-        print("-" * 60)
+        # Steps 2-3: Designer and Composer touch disjoint tag types, so each edits
+        # its own fork concurrently and the forks are merged before the Checker
         designer_input = f"Task: Add [VISUAL] direction tags throughout Draft {draft_num}"
-        print(f"INPUT:\n{designer_input}")
-        designer_result = self.designer.add_visuals(editor, draft_num)
-        print(f"\nOUTPUT:\n{designer_result}")
-        print("-" * 60)
-        
-        # Step 3: Composer  
-        print("\n[3/5] Composer - Adding audio direction...")
-        print("-" * 60)
         composer_input = f"Task: Add [AUDIO] direction tags throughout Draft {draft_num}"
-        print(f"INPUT:\n{composer_input}")
-        composer_result = self.composer.add_audio(editor, draft_num)
-        print(f"\nOUTPUT:\n{composer_result}")
+        _emit(
+            "\n[2/5] Designer - Adding visual direction...",
+            "[3/5] Composer - Adding audio direction...",
+            "-" * 60,
+            f"INPUT:\n{designer_input}\n{composer_input}",
+        )
+        designer_doc = editor.fork()
+        composer_doc = editor.fork()
+        designer_result, composer_result = await asyncio.gather(
+            self.designer.add_visuals(designer_doc, draft_num),
+            self.composer.add_audio(composer_doc, draft_num),
+        )
+        merge_result = editor.merge([
+            (self.designer.name, designer_doc),
+            (self.composer.name, composer_doc),
+        ])
+        _emit(
+            f"\nOUTPUT:\n{designer_result}\n{composer_result}",
+            f"  Merged {merge_result['hunks_applied']} edit(s) into the working draft",
+        )
+        for conflict in merge_result["conflicts"]:
+            print(
+                f"Warning: {conflict['agent']} edit at base lines "
+                f"{conflict['base_start']}-{conflict['base_end']} overlapped "
+                f"{conflict['kept_agent']}'s and was dropped"
+            )
         print("-" * 60)
         
         # Step 4: Checker
-        print("\n[4/5] Checker - Validating and fixing...")
-        print("-" * 60)
-        checker_input = f"Task: Validate and fix Draft {draft_num} (check for plot holes, consistency, format)"
-        print(f"INPUT:\n{checker_input}")
-        checker_result = self.checker.check_and_fix(editor, draft_num)
-        print(f"\nOUTPUT:\n{checker_result}")
-        print("-" * 60)
+        if not run_checker:
+            print("\n[4/5] Checker - Skipped (no plot holes or format issues flagged last draft)")
+            checker_result = {"skipped": True}
+            checker_noop = None
+        else:
+            checker_input = f"Task: Validate and fix Draft {draft_num} (check for plot holes, consistency, format)"
+            _emit(
+                "\n[4/5] Checker - Validating and fixing...",
+                "-" * 60,
+                f"INPUT:\n{checker_input}",
+            )
+            pre_check = self._content_digest(editor.get_content())
+            if CHECKER_BATCH_MODE and draft_num < total_drafts:
+                # Non-final passes are not latency-critical, so trade speed for batch pricing
+                [checker_result] = await self.checker.check_and_fix_batch([(editor, draft_num)])
+            else:
+                checker_result = await self.checker.check_and_fix(editor, draft_num)
+            # Edits can cancel out, so compare content rather than editor.version
+            checker_noop = self._content_digest(editor.get_content()) == pre_check
+            _emit(
+                f"\nOUTPUT:\n{checker_result}",
+                *(["  Checker left the draft unchanged"] if checker_noop else []),
+                "-" * 60,
+            )
         
-        # Save this draft version
-        draft_path = os.path.join(DRAFTS_DIR, f"draft_{draft_num:02d}.md")
-        shutil.copy(editor.filepath, draft_path)
-        print(f"  Draft saved: {draft_path}")
+        editor.save()  # Fold logged edits into the working file
         
         # Step 5: Audience feedback
-        print("\n[5/5] AudienceSim - Generating feedback...")
-        print("-" * 60)
         content = editor.get_content()
-        audience_input = f"Content length: {len(content)} chars, Draft {draft_num}"
-        print(f"INPUT:\n{audience_input}")
-        audience_result = self._get_audience_feedback(
-            content, draft_num, previous_feedback
-        )
+        if defer_feedback:
+            print("\n[5/5] AudienceSim - Deferred to the end-of-run batch job")
+            audience_result = {"feedback": ""}
+        else:
+            audience_input = f"Content length: {len(content)} chars, Draft {draft_num}"
+            _emit(
+                "\n[5/5] AudienceSim - Generating feedback...",
+                "-" * 60,
+                f"INPUT:\n{audience_input}",
+            )
+            feedback_call = self._get_audience_feedback(
+                content, draft_num, previous_summary or previous_feedback
+            )
+            if draft_num < min(total_drafts, MIN_DRAFTS):
+                # The editing agents are idle until the next draft, so their
+                # context upkeep for it overlaps the audience call. From
+                # MIN_DRAFTS on this feedback may end the run, and with it
+                # any need for that upkeep, so it waits for the next draft
+                audience_result, _ = await asyncio.gather(
+                    feedback_call, self._manage_agent_contexts(draft_num + 1)
+                )
+            else:
+                audience_result = await feedback_call
+            self._print_feedback(audience_result)
         feedback = audience_result["feedback"]
-        print(f"\nOUTPUT:\nFeedback: {feedback[:500]}...")
-        print(f"  <engagement_score>: {audience_result.get('engagement_score', 'N/A')}")
-        print(f"  <plot_holes_found>: {audience_result.get('plot_holes_found', 'N/A')}")
-        print(f"  <ready_for_production>: {audience_result.get('ready_for_production', 'N/A')}")
-        print(f"  <priority>: {audience_result.get('priority', 'N/A')}")
-        print("-" * 60)
         
-        # Append feedback as HTML comment
-        with open(draft_path, 'a', encoding='utf-8') as f:
-            f.write(f"\n\n---\n\n<!-- AUDIENCE FEEDBACK\n{feedback}\n-->")
+        # Save this draft version from memory
+        draft_path = self._write_draft(draft_num, content, feedback)
+        print(f"  Draft saved: {draft_path}")
         
         duration = (datetime.now() - start_time).total_seconds()
         
         # Count elements
-        visual_count = content.count("[VISUAL]")
-        audio_count = content.count("[AUDIO]")
-        scene_count = content.count("## SCENE")
-        
-        result = {
-            "draft_num": draft_num,
-            "feedback": feedback,
-            "engagement_score": audience_result.get("engagement_score"),
-            "plot_holes_found": audience_result.get("plot_holes_found"),
-            "ready_for_production": audience_result.get("ready_for_production"),
-            "priority": audience_result.get("priority"),
-            "visual_count": visual_count,
-            "audio_count": audio_count,
-            "scene_count": scene_count,
-            "duration_seconds": duration,
-            "edit_history": editor.get_edit_history(),
-        }
+        counts = editor.get_counts()
+        visual_count = counts["visuals"]
+        audio_count = counts["audio"]
+        scene_count = counts["scenes"]
+        
+        result = DraftResult(
+            draft_num=draft_num,
+            feedback=feedback,
+            feedback_summary=audience_result.get("summary", feedback),
+            engagement_score=audience_result.get("engagement_score"),
+            plot_holes_found=audience_result.get("plot_holes_found"),
+            ready_for_production=audience_result.get("ready_for_production"),
+            priority=audience_result.get("priority"),
+            visual_count=visual_count,
+            audio_count=audio_count,
+            scene_count=scene_count,
+            duration_seconds=duration,
+            merge_conflicts=merge_result["conflicts"],
+            checker_noop=checker_noop,
+            edits_path=self._write_edits(draft_num, editor.get_edit_history(since_version=start_version)),
+        )
         
         self.history.append(result)
+        if defer_feedback:
+            self._deferred_feedback.append((result, content))
+        else:
+            self._log_history(result)
         
-        print(f"\n{'='*60}")
-        print(f"Draft {draft_num} Complete! ({duration:.1f}s)")
-        print(f"Scenes: {scene_count}, Visuals: {visual_count}, Audio: {audio_count}")
+        summary = [
+            f"\n{'='*60}",
+            f"Draft {draft_num} Complete! ({duration:.1f}s)",
+            f"Scenes: {scene_count}, Visuals: {visual_count}, Audio: {audio_count}",
+        ]
         if audience_result.get("engagement_score"):
             score = audience_result['engagement_score']
             status = "🚨 Plot holes!" if audience_result.get("plot_holes_found") else ""
             ready = "✅ Ready!" if audience_result.get("ready_for_production") else ""
-            print(f"Engagement Score: {score}/10 {status} {ready}")
-        print(f"{'='*60}")
+            summary.append(f"Engagement Score: {score}/10 {status} {ready}")
+        summary.append(f"{'='*60}")
+        _emit(*summary)
         
         return result
     
+    @staticmethod
+    def _checker_needed(draft_num: int, total_drafts: int, previous_result: Optional[DraftResult]) -> bool:
+        """
+        Decide whether a draft needs the Checker pass.
+        
+        It is skipped only when the previous draft's audience reported no
+        plot holes and raised no format or consistency concerns. The first
+        draft, the last draft and every CHECKER_SAFETY_INTERVAL-th draft are
+        always checked.
+        
+        Args:
+            draft_num: Draft about to run
+            total_drafts: Total number of drafts
+            previous_result: run_draft() result for the previous draft, if any
+            
+        Returns:
+            True if the Checker should run
+        """
+        if (
+            not CHECKER_SKIP_CLEAN_DRAFTS
+            or previous_result is None
+            or draft_num == total_drafts
+            or draft_num % CHECKER_SAFETY_INTERVAL == 0
+        ):
+            return True
+        if previous_result.plot_holes_found is not False:
+            return True
+        return bool(_CHECKER_ISSUE_RE.search(previous_result.feedback_summary or ""))
+    
     def run_all_drafts(self, user_message: str = "") -> str:
         """
         Run all drafts.
@@ -345,65 +840,152 @@ Ask yourself: "Why don't they just...?"
         Returns:
             Path to final story
         """
-        print("\n" + "="*60)
-        print("STARTING MULTI-DRAFT MOVIE CREATION (Editor Mode)")
-        print(f"Total Drafts: {TOTAL_DRAFTS}")
-        print("="*60)
+        return asyncio.run(self.run_all_drafts_async(user_message))
+    
+    async def run_all_drafts_async(self, user_message: str = "") -> str:
+        """
+        Run all drafts inside a single event loop.
+        
+        Args:
+            user_message: Initial prompt
+            
+        Returns:
+            Path to final story
+        """
+        _emit(
+            "\n" + "="*60,
+            "STARTING MULTI-DRAFT MOVIE CREATION (Editor Mode)",
+            f"Total Drafts: {TOTAL_DRAFTS}",
+            "="*60,
+        )
         
         # Research phase
-        research = self.run_research(user_message)
+        research = await self.run_research(user_message)
+        await self.writer.set_research(research)
         
         # Initialize working document
         editor = DocumentEditor(self.working_doc_path)
         editor.clear()  # Start fresh
+        open(self.history_log_path, 'w', encoding='utf-8').close()
         
         previous_feedback = ""
+        previous_summary = ""
+        previous_result = None
         
         for draft_num in range(1, TOTAL_DRAFTS + 1):
-            result = self.run_draft(
+            result = await self.run_draft(
                 editor=editor,
                 draft_num=draft_num,
                 total_drafts=TOTAL_DRAFTS,
                 previous_feedback=previous_feedback,
+                previous_summary=previous_summary,
                 user_message=user_message if draft_num == 1 else "",
-                research=research if draft_num == 1 else "",
+                defer_feedback=AUDIENCE_BATCH_MODE,
+                run_checker=self._checker_needed(draft_num, TOTAL_DRAFTS, previous_result),
             )
             
-            previous_feedback = result["feedback"]
+            previous_feedback = DEFERRED_FEEDBACK if AUDIENCE_BATCH_MODE else result.feedback
+            previous_summary = "" if AUDIENCE_BATCH_MODE else result.feedback_summary
+            previous_result = result
+            
+            # Further drafts cost five agent calls each for no expected gain
+            if (
+                draft_num >= MIN_DRAFTS
+                and result.ready_for_production
+                and not result.plot_holes_found
+            ):
+                print(f"\nDraft {draft_num} is ready for production, skipping the remaining drafts")
+                break
+        
+        await self._collect_deferred_feedback()
         
         # Copy final to final_story.md
-        shutil.copy(self.working_doc_path, FINAL_STORY_PATH)
+        shutil.copy(self.working_doc_path, self.final_story_path)
         
-        print(f"\n{'='*60}")
-        print("ALL DRAFTS COMPLETE!")
-        print(f"Final story: {FINAL_STORY_PATH}")
-        print(f"{'='*60}")
+        _emit(
+            f"\n{'='*60}",
+            "ALL DRAFTS COMPLETE!",
+            f"Final story: {self.final_story_path}",
+            f"{'='*60}",
+        )
         
         # Save history
         self._save_history()
         
-        return FINAL_STORY_PATH
+        # Context archives are written in the background
+        self.context_manager.flush()
+        
+        return self.final_story_path
+    
+    def _log_history(self, entry: DraftResult) -> None:
+        """Append a completed draft to the history log, so a crash keeps it."""
+        persisted = {name: getattr(entry, name) for name in _PERSISTED_FIELDS}
+        with open(self.history_log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(persisted) + "\n")
     
     def _save_history(self) -> str:
-        """Save pipeline history."""
-        filepath = os.path.join(OUTPUT_DIR, "pipeline_history.json")
+        """Save pipeline history, assembled from the per-draft history log."""
+        filepath = os.path.join(self.output_dir, "pipeline_history.json")
         
         serializable = []
-        for entry in self.history:
-            serializable.append({
-                "draft_num": entry["draft_num"],
-                "engagement_score": entry.get("engagement_score"),
-                "plot_holes_found": entry.get("plot_holes_found"),
-                "ready_for_production": entry.get("ready_for_production"),
-                "priority": entry.get("priority"),
-                "visual_count": entry.get("visual_count", 0),
-                "audio_count": entry.get("audio_count", 0),
-                "scene_count": entry.get("scene_count", 0),
-                "duration_seconds": entry.get("duration_seconds", 0),
-            })
+        if os.path.exists(self.history_log_path):
+            with open(self.history_log_path, 'r', encoding='utf-8') as f:
+                serializable = [json.loads(line) for line in f if line.strip()]
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(serializable, f, indent=2)
         
         return filepath
 
+
+def run_batch(
+    user_messages: list[str],
+    api_key: Optional[str] = None,
+    output_dir: str = OUTPUT_DIR,
+) -> list[str]:
+    """
+    Draft several independent stories concurrently.
+    
+    Args:
+        user_messages: One initial prompt per story
+        api_key: Optional Gemini API key
+        output_dir: Parent directory; story N is written to story_NN inside it
+        
+    Returns:
+        Paths to the final stories, in prompt order
+    """
+    return asyncio.run(run_batch_async(user_messages, api_key, output_dir))
+
+
+async def run_batch_async(
+    user_messages: list[str],
+    api_key: Optional[str] = None,
+    output_dir: str = OUTPUT_DIR,
+) -> list[str]:
+    """
+    Draft several independent stories inside a single event loop.
+    
+    Each story gets its own pipeline, so their Gemini calls interleave.
+    At most MAX_CONCURRENT_STORIES run at once to stay within rate limits.
+    
+    Args:
+        user_messages: One initial prompt per story
+        api_key: Optional Gemini API key
+        output_dir: Parent directory; story N is written to story_NN inside it
+        
+    Returns:
+        Paths to the final stories, in prompt order
+    """
+    slots = asyncio.Semaphore(MAX_CONCURRENT_STORIES)
+    
+    async def run_story(story_num: int, user_message: str) -> str:
+        async with slots:
+            pipeline = EditorPipeline(
+                api_key, output_dir=os.path.join(output_dir, f"story_{story_num:02d}")
+            )
+            return await pipeline.run_all_drafts_async(user_message)
+    
+    return list(await asyncio.gather(*(
+        run_story(story_num, user_message)
+        for story_num, user_message in enumerate(user_messages, 1)
+    )))